@@ -83,3 +83,29 @@ class IgnoreRelationSystemRedisOptimized:
     def get_ignored_seekers_for_job(self, job_id: int) -> list:
         seeker_ids = self.redis.smembers(self._job_index_key(job_id))
         return list(map(int, seeker_ids))
+
+    def get_ignored_pairs(self, pairs: list) -> set:
+        """(seeker_id, job_id) çiftlerinden iki taraftan biri tarafından ignore edilenleri tek pipeline ile döner"""
+        pairs = [(int(seeker_id), int(job_id)) for seeker_id, job_id in pairs]
+        if not pairs:
+            return set()
+
+        # Relation kaydı, yönü ne olursa olsun ignore edilmiş her çift için vardır
+        pipe = self.redis.pipeline(transaction=False)
+        for seeker_id, job_id in pairs:
+            pipe.exists(self._relation_key(seeker_id, job_id))
+        flags = pipe.execute()
+
+        return {pair for pair, flag in zip(pairs, flags) if flag}
+
+    def get_ignored_jobs_for_seekers(self, seeker_ids: list) -> dict:
+        pipe = self.redis.pipeline(transaction=False)
+        for seeker_id in seeker_ids:
+            pipe.smembers(self._seeker_index_key(seeker_id))
+        return {seeker_id: set(map(int, job_ids)) for seeker_id, job_ids in zip(seeker_ids, pipe.execute())}
+
+    def get_ignored_seekers_for_jobs(self, job_ids: list) -> dict:
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.smembers(self._job_index_key(job_id))
+        return {job_id: set(map(int, seeker_ids)) for job_id, seeker_ids in zip(job_ids, pipe.execute())}
@@ -0,0 +1,66 @@
+"""
+Latency of the lexical part of hybrid re-ranking (SkillIndex.overlap_scores).
+
+    python -m benchmarks.hybrid_rerank_bench --entities 100000 --candidates 250
+
+Skills follow a Zipf-like distribution over a synthetic vocabulary.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from skillindex import SkillIndex
+
+
+def synthetic_skills(rng, vocabulary, n, min_skills=3, max_skills=15):
+    ranks = np.arange(1, len(vocabulary) + 1)
+    probabilities = (1 / ranks ** 1.1)
+    probabilities /= probabilities.sum()
+    return [
+        list(rng.choice(vocabulary, size=rng.integers(min_skills, max_skills + 1), replace=False, p=probabilities))
+        for _ in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=100000)
+    parser.add_argument("--vocabulary", type=int, default=3000)
+    parser.add_argument("--candidates", type=int, default=250)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    vocabulary = [f"skill_{i}" for i in range(args.vocabulary)]
+    skills = synthetic_skills(rng, vocabulary, args.entities)
+
+    index = SkillIndex()
+    started = time.perf_counter()
+    for entity_id, entity_skills in enumerate(skills):
+        index.add(entity_id, entity_skills)
+    build_s = time.perf_counter() - started
+
+    queries = synthetic_skills(rng, vocabulary, args.queries)
+    latencies = []
+    for query in queries:
+        candidate_ids = rng.choice(args.entities, size=args.candidates, replace=False).tolist()
+        candidate_skills = [skills[i] for i in candidate_ids]
+        started = time.perf_counter()
+        index.overlap_scores(query, candidate_ids, candidate_skills)
+        latencies.append(time.perf_counter() - started)
+
+    latencies = np.asarray(latencies) * 1000
+    print(json.dumps({
+        "entities": args.entities,
+        "candidates": args.candidates,
+        "index_build_s": round(build_s, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Load / regression benchmark of the full match pipeline.
+
+    python -m benchmarks.load_test --jobs 5000 --seekers 5000 --requests 500 --concurrency 8 --output run.json
+    python -m benchmarks.load_test ... --baseline previous.json      # prints the change per stage
+    python -m benchmarks.load_test --url http://localhost:8000 ...   # a running server instead
+
+By default the Flask app in server.py runs in-process with stand-ins:
+VECTOR_BACKEND=local (LocalCollection in a temp dir) instead of Milvus and
+fakeredis instead of Redis (pip install -r requirements-dev.txt, which also
+brings pytest for tests/). --encoder hash also replaces the sentence
+transformer with a hashed bag-of-skills encoder, which isolates the cost of
+everything around the model (use it for regressions in search / ranking /
+serialization, not for absolute numbers).
+
+Synthetic seekers and job posts draw skills from role-based, Zipf-weighted
+vocabularies and coordinates around real cities. Stages run in order:
+ingest (POST /job_posts, /job_seekers), matches (/matches/job_posts,
+/matches/job_seekers, /matches/mutual/*), POST /ignore and the delete
+endpoints. Every stage reports throughput, p50/p95/p99 latency, error count
+and, in-process only, memory (RSS at the end of the stage and the peak so
+far). With --url the server's memory is not visible from here, so the RSS
+fields are left out. Each entity gets a tenantId out of --tenants, which is
+what --partition-strategy tenant partitions on.
+"""
+import argparse
+import hashlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.local_backend_bench import DIM, percentiles
+
+ROLES = {
+    "backend": ["python", "java", "go", "sql", "postgresql", "django", "spring boot", "rest api", "redis",
+                "docker", "kubernetes", "microservices", "kafka", "node.js", "c#", ".net", "mongodb", "git"],
+    "frontend": ["javascript", "typescript", "react", "vue.js", "angular", "html", "css", "sass", "webpack",
+                 "redux", "next.js", "figma", "jest", "git", "rest api", "tailwind"],
+    "data": ["python", "sql", "pandas", "numpy", "machine learning", "scikit-learn", "pytorch", "tensorflow",
+             "spark", "airflow", "tableau", "power bi", "statistics", "excel", "r", "deep learning"],
+    "devops": ["linux", "docker", "kubernetes", "terraform", "ansible", "aws", "azure", "gcp", "jenkins",
+               "ci/cd", "prometheus", "grafana", "bash", "nginx", "git", "helm"],
+    "mobile": ["kotlin", "swift", "android", "ios", "flutter", "dart", "react native", "firebase", "rest api",
+               "git", "objective-c", "xcode"],
+    "sales": ["satış", "müşteri ilişkileri", "crm", "b2b satış", "ikna kabiliyeti", "excel", "raporlama",
+              "pazarlama", "sunum", "ingilizce", "salesforce", "müzakere"],
+    "operations": ["lojistik", "depo yönetimi", "forklift", "stok takibi", "sap", "excel", "tedarik zinciri",
+                   "ehliyet b", "planlama", "kalite kontrol", "iş güvenliği"],
+    "hospitality": ["garsonluk", "mutfak", "barista", "resepsiyon", "müşteri hizmetleri", "ingilizce",
+                    "hijyen", "kasa", "temizlik", "rezervasyon", "almanca"],
+}
+GENERAL_SKILLS = ["iletişim", "takım çalışması", "problem çözme", "ingilizce", "microsoft office",
+                  "zaman yönetimi", "analitik düşünme", "liderlik"]
+CITIES = [
+    (41.0082, 28.9784, 0.30), (39.9334, 32.8597, 0.12), (38.4237, 27.1428, 0.10), (40.1885, 29.0610, 0.06),
+    (36.8969, 30.7133, 0.06), (37.0000, 35.3213, 0.05), (37.8746, 32.4932, 0.04), (37.0662, 37.3833, 0.04),
+    (41.0015, 39.7178, 0.03), (39.7767, 30.5206, 0.03), (52.5200, 13.4050, 0.04), (51.5074, -0.1278, 0.03),
+    (48.8566, 2.3522, 0.03), (40.7128, -74.0060, 0.03), (25.2048, 55.2708, 0.04),
+]
+
+
+# Sentetik veri
+
+def _zipf_choice(rng, items, size):
+    weights = 1 / np.arange(1, len(items) + 1) ** 1.1
+    return list(rng.choice(items, size=min(size, len(items)), replace=False, p=weights / weights.sum()))
+
+
+def synthetic_entities(rng, n: int, start_id: int, tenants: int = 1):
+    roles = list(ROLES)
+    cities = np.array([c[:2] for c in CITIES])
+    city_p = np.array([c[2] for c in CITIES])
+    city_p /= city_p.sum()
+
+    entities = []
+    for i in range(n):
+        role = roles[rng.integers(len(roles))]
+        skills = _zipf_choice(rng, ROLES[role], int(rng.integers(3, 11)))
+        skills += _zipf_choice(rng, GENERAL_SKILLS, int(rng.integers(0, 3)))
+        # Farklı roller arası geçiş (ör. backend + devops)
+        if rng.random() < 0.2:
+            skills += _zipf_choice(rng, ROLES[roles[rng.integers(len(roles))]], 2)
+
+        lat, lon = cities[rng.choice(len(cities), p=city_p)] + rng.normal(scale=0.15, size=2)
+        entities.append({
+            "id": start_id + i,
+            "userId": int(rng.integers(1, 10 ** 6)),
+            "tenantId": f"tenant_{int(rng.integers(tenants))}",
+            "skills": list(dict.fromkeys(skills)),
+            "latitude": round(float(lat), 6),
+            "longitude": round(float(lon), 6),
+        })
+    return entities
+
+
+class HashingEncoder:
+    """Deterministic bag-of-skills encoder with the sentence transformer's encode() surface"""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+        self._cache = {}
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._cache.get(token)
+        if vector is None:
+            seed = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            vector = self._cache[token] = np.random.default_rng(seed).normal(size=self.dim).astype(np.float32)
+        return vector
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.split():
+                vectors[row] += self._token_vector(token)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1)
+        return vectors[0] if single else vectors
+
+
+# İstemciler
+
+class InProcessClient:
+    """server.app behind Flask's test client, with LocalCollection and fakeredis stand-ins"""
+
+    def __init__(self, data_path: str, encoder: str, partition_strategy: str = None):
+        import fakeredis
+        import redis
+
+        os.environ["VECTOR_BACKEND"] = "local"
+        os.environ["LOCAL_VECTOR_PATH"] = data_path
+        if partition_strategy:
+            os.environ["PARTITION_STRATEGY"] = partition_strategy
+
+        fake_server = fakeredis.FakeServer()
+        redis.Redis = lambda *args, **kwargs: fakeredis.FakeRedis(*args, server=fake_server, **kwargs)
+
+        if encoder == "hash":
+            import modelloader
+            modelloader._models["all-MiniLM-L12-v2"] = HashingEncoder()
+
+        import server
+
+        self.server = server
+        self._local = threading.local()
+
+    def wait_ready(self, timeout: float):
+        deadline = time.time() + timeout
+        while not self.server.startup.is_ready():
+            if time.time() > deadline:
+                raise Exception(f"Server not ready: {self.server.startup.report()}")
+            time.sleep(0.1)
+
+    def request(self, method: str, path: str, body=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.server.app.test_client()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def wait_ready(self, timeout: float):
+        deadline = time.time() + timeout
+        while self.request("GET", "/health/ready") != 200:
+            if time.time() > deadline:
+                raise Exception(f"{self.base_url} not ready")
+            time.sleep(0.5)
+
+    def request(self, method: str, path: str, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"} if data else {})
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return 0
+
+
+# Ölçüm
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'ta KiB, macOS'ta byte
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def run_stage(name: str, client, calls, concurrency: int, ok_statuses=(200,), measure_memory: bool = True):
+    """calls: list of (method, path, body); measure_memory=False for remote servers"""
+    rss_before = rss_mb()
+
+    def timed(call):
+        started = time.perf_counter()
+        status = client.request(*call)
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, calls))
+    duration = time.perf_counter() - started
+
+    latencies = [r[0] for r in results]
+    errors = sum(1 for r in results if r[1] not in ok_statuses)
+    stats = {
+        "stage": name,
+        "requests": len(calls),
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(calls) / duration, 2) if duration else None,
+        **(percentiles(latencies) if latencies else {}),
+    }
+    if measure_memory:
+        rss = rss_mb()
+        stats.update(rss_mb=round(rss, 1), rss_delta_mb=round(rss - rss_before, 1),
+                     peak_rss_mb=round(peak_rss_mb(), 1))
+    print(json.dumps(stats))
+    return stats
+
+
+def build_stages(rng, jobs, seekers, args):
+    job_ids = [j["id"] for j in jobs]
+    seeker_ids = [s["id"] for s in seekers]
+    bs = args.batch_size
+
+    def sample(ids, n):
+        return [int(i) for i in rng.choice(ids, size=n)]
+
+    stages = [
+        ("ingest_job_posts", [("POST", "/job_posts", jobs[i:i + bs]) for i in range(0, len(jobs), bs)]),
+        ("ingest_job_seekers", [("POST", "/job_seekers", seekers[i:i + bs]) for i in range(0, len(seekers), bs)]),
+        ("matches_job_posts", [("GET", f"/matches/job_posts/{i}", None) for i in sample(job_ids, args.requests)]),
+        ("matches_job_seekers", [("GET", f"/matches/job_seekers/{i}", None)
+                                 for i in sample(seeker_ids, args.requests)]),
+        ("matches_mutual_job_seekers", [("GET", f"/matches/mutual/job_seekers/{i}", None)
+                                        for i in sample(seeker_ids, args.requests)]),
+        ("matches_mutual_job_posts", [("GET", f"/matches/mutual/job_posts/{i}", None)
+                                      for i in sample(job_ids, args.requests)]),
+        ("ignore", [("POST", "/ignore", {"seeker_id": s, "job_id": j, "is_seeker_initiated": bool(rng.random() < 0.5)})
+                    for s, j in zip(sample(seeker_ids, args.requests), sample(job_ids, args.requests))]),
+    ]
+
+    deletes = max(1, int(args.requests * args.delete_fraction))
+    deleted_jobs = [int(i) for i in rng.choice(job_ids, size=min(deletes, len(job_ids)), replace=False)]
+    deleted_seekers = [int(i) for i in rng.choice(seeker_ids, size=min(deletes, len(seeker_ids)), replace=False)]
+    stages.append(("delete", [("POST", f"/delete/job_posts/{i}", None) for i in deleted_jobs] +
+                   [("POST", f"/delete/job_seeker/{i}", None) for i in deleted_seekers]))
+    # Silmelerden sonra arama (tombstone'lu koleksiyon)
+    stages.append(("matches_after_delete", [("GET", f"/matches/job_seekers/{i}", None)
+                                            for i in sample(sorted(set(seeker_ids) - set(deleted_seekers)),
+                                                            args.requests)]))
+    return stages
+
+
+def compare(report, baseline):
+    previous = {s["stage"]: s for s in baseline["stages"]}
+    print("\nstage                          p95_ms (before -> after)      rps (before -> after)")
+    for stage in report["stages"]:
+        old = previous.get(stage["stage"])
+        if not old or "p95_ms" not in stage:
+            continue
+        p95_change = (stage["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0
+        rps_change = (stage["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] * 100 \
+            if old["throughput_rps"] else 0
+        print(f"{stage['stage']:<30} {old['p95_ms']:>9.2f} -> {stage['p95_ms']:<9.2f} ({p95_change:+6.1f}%)"
+              f"   {old['throughput_rps']:>8.1f} -> {stage['throughput_rps']:<8.1f} ({rps_change:+6.1f}%)")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of ingest, match, ignore and delete endpoints")
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--seekers", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per match / ignore stage")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100, help="Records per ingest request")
+    parser.add_argument("--delete-fraction", type=float, default=0.1,
+                        help="Deletes per side, as a fraction of --requests")
+    parser.add_argument("--encoder", choices=["model", "hash"], default="model")
+    parser.add_argument("--partition-strategy", choices=["none", "region", "tenant"])
+    parser.add_argument("--tenants", type=int, default=20, help="Distinct tenantId values in the synthetic data")
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process stand-ins")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    jobs = synthetic_entities(rng, args.jobs, start_id=1, tenants=args.tenants)
+    seekers = synthetic_entities(rng, args.seekers, start_id=1, tenants=args.tenants)
+
+    # Sunucu uzaktaysa yerel veri dizini ve bellek ölçümü anlamsız
+    data_path = None if args.url else tempfile.mkdtemp(prefix="load_test_")
+    try:
+        started = time.perf_counter()
+        client = HttpClient(args.url) if args.url else InProcessClient(data_path, args.encoder, args.partition_strategy)
+        client.wait_ready(timeout=600)
+        startup_s = time.perf_counter() - started
+
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+            "git_revision": git_revision(),
+            "started_at": int(time.time()),
+            "startup_s": round(startup_s, 3),
+            "memory_measured": data_path is not None,
+            "stages": [],
+        }
+        for name, calls in build_stages(rng, jobs, seekers, args):
+            report["stages"].append(run_stage(name, client, calls, args.concurrency,
+                                              measure_memory=data_path is not None))
+    finally:
+        if data_path is not None:
+            shutil.rmtree(data_path, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Local brute-force backend vs Milvus IVF_FLAT.
+
+    python -m benchmarks.local_backend_bench --sizes 10000 50000 100000 --queries 200
+    python -m benchmarks.local_backend_bench --milvus   # MILVUS_HOST / MILVUS_PORT
+
+Vectors are synthetic (clustered, L2-normalized, dim 384). Reports insert time,
+search latency percentiles and recall@k of IVF_FLAT against the exact results.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from localvectorstore import LocalCollection
+
+DIM = 384
+
+
+def synthetic_vectors(n: int, rng, clusters: int = 64) -> np.ndarray:
+    centers = rng.normal(size=(clusters, DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.35 * rng.normal(size=(n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+def columns(vectors: np.ndarray, start: int = 0):
+    n = len(vectors)
+    ids = list(range(start, start + n))
+    return [ids, vectors.tolist(), [json.dumps({"skills": []})] * n, [False] * n]
+
+
+def bench_local(vectors, queries, k, batch_size, path):
+    collection = LocalCollection("bench", DIM, path)
+
+    started = time.perf_counter()
+    for i in range(0, len(vectors), batch_size):
+        collection.insert(columns(vectors[i:i + batch_size], i))
+    collection.flush()
+    insert_s = time.perf_counter() - started
+
+    latencies, results = [], []
+    for q in queries:
+        started = time.perf_counter()
+        hits = collection.search([q.tolist()], limit=k, expr="is_deleted == false", output_fields=["id"])
+        latencies.append(time.perf_counter() - started)
+        results.append([hit.id for hit in hits[0]])
+
+    return {"insert_s": round(insert_s, 3), **percentiles(latencies)}, results
+
+
+def bench_milvus(vectors, queries, k, batch_size, nprobe):
+    from pymilvus import connections, CollectionSchema, FieldSchema, DataType, Collection, utility
+
+    connections.connect(host=os.getenv("MILVUS_HOST", "localhost"), port=os.getenv("MILVUS_PORT", "19530"))
+    name = "bench_local_backend"
+    if utility.has_collection(name):
+        utility.drop_collection(name)
+
+    schema = CollectionSchema([
+        FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
+        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=DIM),
+        FieldSchema(name="job_data", dtype=DataType.JSON),
+        FieldSchema(name="is_deleted", dtype=DataType.BOOL)
+    ])
+    collection = Collection(name, schema)
+
+    started = time.perf_counter()
+    for i in range(0, len(vectors), batch_size):
+        collection.insert(columns(vectors[i:i + batch_size], i))
+    collection.flush()
+    collection.create_index("embedding", {"metric_type": "IP", "index_type": "IVF_FLAT", "params": {"nlist": 256}})
+    collection.load()
+    insert_s = time.perf_counter() - started
+
+    latencies, results = [], []
+    for q in queries:
+        started = time.perf_counter()
+        hits = collection.search(
+            data=[q.tolist()],
+            anns_field="embedding",
+            param={"metric_type": "IP", "params": {"nprobe": nprobe}},
+            limit=k,
+            expr="is_deleted == false",
+            output_fields=["id"]
+        )
+        latencies.append(time.perf_counter() - started)
+        results.append([hit.id for hit in hits[0]])
+
+    utility.drop_collection(name)
+    return {"insert_and_index_s": round(insert_s, 3), **percentiles(latencies)}, results
+
+
+def recall(exact, approx):
+    return float(np.mean([len(set(e) & set(a)) / max(len(e), 1) for e, a in zip(exact, approx)]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=250)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--milvus", action="store_true", help="Also benchmark a live Milvus IVF_FLAT index")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    report = []
+
+    for size in args.sizes:
+        vectors = synthetic_vectors(size, rng)
+        queries = synthetic_vectors(args.queries, rng)
+        path = tempfile.mkdtemp(prefix="local_backend_bench_")
+        try:
+            local_stats, exact = bench_local(vectors, queries, args.k, args.batch_size, path)
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+        row = {"size": size, "local": local_stats}
+        if args.milvus:
+            milvus_stats, approx = bench_milvus(vectors, queries, args.k, args.batch_size, args.nprobe)
+            row["milvus_ivf_flat"] = {**milvus_stats, f"recall@{args.k}": round(recall(exact, approx), 4)}
+
+        print(json.dumps(row))
+        report.append(row)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Partition-targeted search vs searching the whole collection.
+
+    python -m benchmarks.partition_search_bench --sizes 20000 100000 400000 --queries 200
+
+Entities get synthetic vectors and coordinates spread over the world grid and
+are inserted into region partitions (PartitionManager, PARTITION_CELL_DEGREES
+cells) of a LocalCollection. Each query searches either every partition or
+only the partitions PartitionManager.search_partitions() returns for its
+location; latency should stay flat in the partitioned case as the corpus grows.
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.local_backend_bench import DIM, percentiles, synthetic_vectors
+from localvectorstore import LocalCollection
+from partitioning import PartitionManager
+
+
+class _System:
+    """Just enough of a search system for PartitionManager"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.collection_name = collection.name
+
+
+def synthetic_locations(n: int, rng, hubs: int = 200):
+    # Kayıtlar şehir merkezleri etrafında kümelenir
+    centers = np.column_stack([rng.uniform(-60, 70, hubs), rng.uniform(-180, 180, hubs)])
+    points = centers[rng.integers(0, hubs, n)] + rng.normal(scale=1.5, size=(n, 2))
+    return np.column_stack([np.clip(points[:, 0], -89.9, 89.9), np.clip(points[:, 1], -179.9, 179.9)])
+
+
+def build(path, vectors, locations, batch_size, cell_degrees):
+    collection = LocalCollection("bench", DIM, path)
+    partitions = PartitionManager(_System(collection), strategy="region", cell_degrees=cell_degrees,
+                                  max_loaded=100000)
+
+    started = time.perf_counter()
+    for start in range(0, len(vectors), batch_size):
+        chunk = range(start, min(start + batch_size, len(vectors)))
+        records = [{"latitude": float(locations[i, 0]), "longitude": float(locations[i, 1])} for i in chunk]
+        columns = [list(chunk), vectors[start:chunk.stop].tolist(),
+                   [json.dumps(r) for r in records], [False] * len(records)]
+        for name, part in partitions.split(columns, records):
+            partitions.ensure_partition(name)
+            collection.insert(part, partition_name=name)
+    collection.flush()
+    return collection, partitions, time.perf_counter() - started
+
+
+def run_queries(collection, queries, query_locations, k, partitions=None):
+    latencies, searched = [], []
+    for q, (lat, lon) in zip(queries, query_locations):
+        names = None
+        if partitions is not None:
+            names = partitions.search_partitions({"latitude": float(lat), "longitude": float(lon)})
+            searched.append(len(names))
+        started = time.perf_counter()
+        collection.search([q.tolist()], limit=k, expr="is_deleted == false", output_fields=["id"],
+                          partition_names=names)
+        latencies.append(time.perf_counter() - started)
+    return latencies, searched
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 100000, 400000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=250)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--cell-degrees", type=float, default=5)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    report = []
+
+    for size in args.sizes:
+        vectors = synthetic_vectors(size, rng)
+        locations = synthetic_locations(size, rng)
+        queries = synthetic_vectors(args.queries, rng)
+        query_locations = locations[rng.integers(0, size, args.queries)]
+
+        path = tempfile.mkdtemp(prefix="partition_search_bench_")
+        try:
+            collection, partitions, insert_s = build(path, vectors, locations, args.batch_size, args.cell_degrees)
+            full, _ = run_queries(collection, queries, query_locations, args.k)
+            targeted, searched = run_queries(collection, queries, query_locations, args.k, partitions)
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+        row = {
+            "size": size,
+            "partitions": len(partitions.known_partitions(refresh=True)),
+            "insert_s": round(insert_s, 3),
+            "full": percentiles(full),
+            "partitioned": {**percentiles(targeted), "avg_partitions_searched": round(float(np.mean(searched)), 2)},
+        }
+        print(json.dumps(row))
+        report.append(row)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Match response serialization: the previous jsonify path vs serialization.py.
+
+    python -m benchmarks.serialization_bench --matches 250 --iterations 2000
+
+"jsonify_sorted" is the format before serialization.py: one dict per match,
+a Python-level sort and Flask's jsonify. The other variants build the rows
+with match_rows() / match_columns() (results already arrive sorted) and
+encode them with dumps() (orjson when installed), as parallel arrays
+(?layout=columnar) and as msgpack when it is installed. Reports encode time per response, body
+size and gzip size.
+"""
+import argparse
+import gzip
+import json
+import time
+
+import numpy as np
+from flask import Flask, jsonify
+
+import serialization
+from serialization import dumps, match_columns, match_rows
+
+
+def synthetic_results(rng, n):
+    scores = np.sort(rng.uniform(40, 95, n))[::-1]
+    return [
+        {
+            "job_id": int(rng.integers(1, 10 ** 7)),
+            "score": round(float(score), 1),
+            "milvus_score": round(float(score + rng.normal(scale=3)), 1),
+            "radius": round(float(rng.uniform(0, 50)), 2),
+            "userId": int(rng.integers(1, 10 ** 6)),
+            "is_ignored": False,
+        }
+        for score in scores
+    ]
+
+
+def previous_format(results):
+    matches = []
+    for match in results:
+        matches.append({
+            "job_post_id": match["job_id"],
+            "score": match["score"],
+            "milvus_score": match.get("milvus_score", 0),
+            "radius_km": match.get("radius", 0),
+            "userId": match.get("userId"),
+            "is_ignored": match.get("is_ignored")
+        })
+    sorted_matches = sorted(matches, key=lambda x: x["score"], reverse=True)
+    return jsonify({"job_seeker_id": 1, "matches": sorted_matches, "source": "live",
+                    "staleness_seconds": None}).get_data()
+
+
+def rows_payload(results):
+    return {"job_seeker_id": 1, "matches": match_rows(results, "job_post_id"), "source": "live",
+            "staleness_seconds": None}
+
+
+def columnar_payload(results):
+    return {"job_seeker_id": 1, "matches": match_columns(results, "job_post_id"), "source": "live",
+            "staleness_seconds": None}
+
+
+def measure(fn, results, iterations):
+    timings = []
+    body = b""
+    for _ in range(iterations):
+        started = time.perf_counter()
+        body = fn(results)
+        timings.append(time.perf_counter() - started)
+    timings = np.asarray(timings) * 10 ** 6
+    return {
+        "p50_us": round(float(np.percentile(timings, 50)), 1),
+        "p95_us": round(float(np.percentile(timings, 95)), 1),
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=5)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matches", type=int, nargs="+", default=[50, 250, 1000])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    rng = np.random.default_rng(3)
+    variants = {
+        "jsonify_sorted": previous_format,
+        "json_rows": lambda r: dumps(rows_payload(r)),
+        "json_columnar": lambda r: dumps(columnar_payload(r)),
+    }
+    if serialization.msgpack is not None:
+        variants["msgpack_rows"] = lambda r: serialization.msgpack.packb(rows_payload(r))
+        variants["msgpack_columnar"] = lambda r: serialization.msgpack.packb(columnar_payload(r))
+
+    report = []
+    with app.app_context():
+        for n in args.matches:
+            results = synthetic_results(rng, n)
+            row = {"matches": n, "orjson": serialization.orjson is not None}
+            for name, fn in variants.items():
+                row[name] = measure(fn, results, args.iterations)
+            print(json.dumps(row))
+            report.append(row)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares search_jobs results of the skill vector table fast path with the
+transformer path.
+
+    SKILL_VECTOR_TABLE=./skill_table python -m benchmarks.skill_table_eval --samples 200 --k 10 50 250
+
+Seekers stored in Milvus are used as queries against the job post collection.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from tqdm import tqdm
+
+from jobsearch import JobSearchSystem
+from jobseeker import JobSeekerSearchSystem
+
+
+def iterate_records(collection, page_size: int = 1000, max_records: int = None):
+    offset = 0
+    while True:
+        rows = collection.query(
+            expr="id >= 0",
+            output_fields=["id", "job_data"],
+            offset=offset,
+            limit=page_size
+        )
+        for row in rows:
+            yield {"id": row["id"], **json.loads(row["job_data"])}
+        offset += len(rows)
+        if len(rows) < page_size or (max_records and offset >= max_records):
+            break
+
+
+def overlap_at_k(a, b, k):
+    top_a = {r["job_id"] for r in a[:k]}
+    top_b = {r["job_id"] for r in b[:k]}
+    if not top_a and not top_b:
+        return 1.0
+    return len(top_a & top_b) / max(len(top_a), len(top_b))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 50, 250])
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the skill table from both collections")
+    args = parser.parse_args()
+
+    jss = JobSearchSystem()
+    jseeker = JobSeekerSearchSystem()
+    if jss.skill_table is None:
+        raise SystemExit("SKILL_VECTOR_TABLE must point to the table directory")
+
+    if args.rebuild or len(jss.skill_table) == 0:
+        vocab = set()
+        for system in (jss, jseeker):
+            for record in iterate_records(system.collection):
+                vocab.update(record.get("skills") or [])
+        started = time.perf_counter()
+        jss.build_skill_table(vocab)
+        print(f"Built skill table: {len(jss.skill_table)} skills in {time.perf_counter() - started:.1f}s")
+
+    seekers = [s for s in iterate_records(jseeker.collection, max_records=args.samples) if s.get("skills")]
+    seekers = seekers[:args.samples]
+
+    overlaps = {k: [] for k in args.k}
+    coverage = []
+    timings = {"transformer": [], "skill_table": []}
+
+    for seeker in tqdm(seekers, desc="Evaluating"):
+        skills = sorted(str(s).strip().lower() for s in seeker["skills"])
+        coverage.append(jss.skill_table.coverage(skills))
+
+        started = time.perf_counter()
+        jss._encode_query(skills, use_skill_table=False)
+        timings["transformer"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        jss._encode_query(skills, use_skill_table=True)
+        timings["skill_table"].append(time.perf_counter() - started)
+
+        baseline = jss.search_jobs(seeker, use_skill_table=False)["results"]
+        fast = jss.search_jobs(seeker, use_skill_table=True)["results"]
+        for k in args.k:
+            overlaps[k].append(overlap_at_k(baseline, fast, k))
+
+    report = {
+        "samples": len(seekers),
+        "vocabulary": len(jss.skill_table),
+        "mean_coverage": float(np.mean(coverage)) if coverage else None,
+        "overlap_at_k": {str(k): float(np.mean(v)) if v else None for k, v in overlaps.items()},
+        "encode_ms": {
+            name: {
+                "p50": float(np.percentile(values, 50) * 1000),
+                "p95": float(np.percentile(values, 95) * 1000),
+            } for name, values in timings.items() if values
+        }
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
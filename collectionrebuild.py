@@ -0,0 +1,353 @@
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class RebuildInProgressError(Exception):
+    pass
+
+
+class CollectionRebuilder:
+    """
+    Blue/green rebuild of a search system's collection.
+
+    system.collection_name is served through a Milvus alias. A rebuild
+    creates a versioned shadow collection ({name}_v<timestamp>) with the
+    current schema, bulk-loads it in a background thread (copying the live
+    rows, re-encoding them, or from given records), indexes and loads it and
+    then atomically repoints the alias. The previous version is released but
+    kept for rollback().
+
+    Writes made while a rebuild runs:
+      - this process applies them to both collections (system.shadow_collection);
+      - other writers (the queue consumer, other workers) only reach the live
+        collection, so rows whose job_data.updated_at is newer than the rebuild
+        start are replayed into the shadow before the swap, and once more from
+        the old collection right after it (writes racing the swap itself).
+        Deletes are reconciled by id in copy / reencode modes.
+    rollback() replays writes made since the swap back into the older version
+    the same way before and after repointing the alias. Rows written without
+    updated_at (before it existed) are only covered by the copy itself.
+    """
+
+    MODES = ("copy", "reencode", "records", "empty")
+    # Süreçler arası saat farkı payı (updated_at başka süreçlerde yazılır)
+    CLOCK_SKEW = 5
+
+    def __init__(self, system, batch_size: int = 1000, keep_versions: int = 2):
+        self.system = system
+        self.batch_size = batch_size
+        self.keep_versions = keep_versions
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+        self.status: Dict[str, Any] = {"state": "idle", "alias": system.collection_name}
+
+    @property
+    def alias(self) -> str:
+        return self.system.collection_name
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _update(self, **fields):
+        with self._lock:
+            self.status.update(fields)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            status = dict(self.status)
+        if status.get("total"):
+            status["progress"] = round(status.get("loaded", 0) / status["total"] * 100, 1)
+        return status
+
+    # Alias çözümleme
+
+    def _versions(self) -> List[str]:
+        from pymilvus import utility
+
+        return sorted(c for c in utility.list_collections() if c.startswith(f"{self.alias}_v"))
+
+    def _resolve_current(self) -> Optional[str]:
+        """Real collection currently served under the alias (the alias itself for a legacy collection)"""
+        from pymilvus import utility
+
+        if self.alias in utility.list_collections():
+            return self.alias
+        for name in self._versions():
+            if self.alias in utility.list_aliases(name):
+                return name
+        return None
+
+    # Rebuild
+
+    def start(self, mode: str = "copy", records: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        if self.system.backend != "milvus":
+            raise Exception("Collection rebuild requires the Milvus backend")
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown rebuild mode: {mode}")
+        if mode == "records" and not records:
+            raise ValueError("records mode requires a list of records")
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                raise RebuildInProgressError(f"Rebuild already running for {self.alias}")
+            self._cancel.clear()
+            self.status = {
+                "state": "starting",
+                "alias": self.alias,
+                "mode": mode,
+                "version": None,
+                "previous": None,
+                "loaded": 0,
+                "total": len(records) if records else 0,
+                "started_at": int(time.time()),
+                "finished_at": None,
+                "error": None,
+            }
+            self._thread = threading.Thread(target=self._run, args=(mode, records),
+                                            name=f"rebuild-{self.alias}", daemon=True)
+            self._thread.start()
+        return self.get_status()
+
+    def _check_cancel(self):
+        if self._cancel.is_set():
+            raise Exception("Rebuild cancelled")
+
+    def _copy_rows(self, source, target, ids: List[int], reencode: bool = False):
+        """Copies rows by id (raw, or re-encoded from job_data) keeping the partition layout"""
+        for start in range(0, len(ids), self.batch_size):
+            chunk = ids[start:start + self.batch_size]
+            rows = source.query(
+                expr=f"id in [{', '.join(str(int(i)) for i in chunk)}]",
+                output_fields=["id", "embedding", "job_data", "is_deleted"]
+            )
+            if not rows:
+                continue
+            records = [json.loads(row["job_data"]) for row in rows]
+            if reencode:
+                batch = [{**data, "id": row["id"], "isDeleted": row["is_deleted"]} for row, data in zip(rows, records)]
+                self.system._insert_batch(batch, collection=target)
+                continue
+
+            columns = [
+                [row["id"] for row in rows],
+                [row["embedding"] for row in rows],
+                [row["job_data"] for row in rows],
+                [row["is_deleted"] for row in rows],
+            ]
+            for partition_name, part in self.system.partitions.split(columns, records):
+                self.system.partitions.ensure_partition(partition_name, target)
+                target.upsert(part, partition_name=partition_name)
+
+    def _load_from_live(self, shadow, reencode: bool):
+        ids = self.system.get_active_ids()
+        self._update(total=len(ids))
+
+        for start in range(0, len(ids), self.batch_size):
+            self._check_cancel()
+            chunk = ids[start:start + self.batch_size]
+            self._copy_rows(self.system.collection, shadow, chunk, reencode)
+            self._update(loaded=start + len(chunk))
+
+    def _load_from_records(self, shadow, records: List[Dict[str, Any]]):
+        for start in range(0, len(records), self.batch_size):
+            self._check_cancel()
+            batch = records[start:start + self.batch_size]
+            self.system._insert_batch(batch, collection=shadow)
+            self._update(loaded=start + len(batch))
+
+    @staticmethod
+    def _active_ids(collection) -> set:
+        return {row["id"] for row in collection.query(expr="is_deleted == false", output_fields=["id"])}
+
+    def _catch_up(self, source, target, since: float, reencode: bool = False,
+                  drop_missing_before: Optional[float] = None):
+        """
+        Copies rows written to source since `since` into target. With
+        drop_missing_before, target rows that source no longer has and that were
+        last written before that time are deleted (deleted from source meanwhile).
+        Returns (replayed, dropped).
+        """
+        changed = [row["id"] for row in source.query(
+            expr=f'job_data["updated_at"] >= {since - self.CLOCK_SKEW}', output_fields=["id"])]
+        self._copy_rows(source, target, changed, reencode)
+
+        stale = []
+        if drop_missing_before is not None:
+            missing = self._active_ids(target) - self._active_ids(source)
+            if missing:
+                rows = target.query(expr=f"id in [{', '.join(str(i) for i in missing)}]",
+                                    output_fields=["id", "job_data"])
+                stale = [row["id"] for row in rows
+                         if json.loads(row["job_data"]).get("updated_at", 0) < drop_missing_before]
+            if stale:
+                target.delete(expr=f"id in [{', '.join(str(i) for i in stale)}]")
+        if changed or stale:
+            target.flush()
+        return len(changed), len(stale)
+
+    def _reconcile(self, shadow):
+        """Drops rows deleted from the live collection while the copy was running"""
+        live_ids = set(self.system.get_active_ids())
+        shadow_ids = {row["id"] for row in shadow.query(expr="is_deleted == false", output_fields=["id"])}
+        stale = shadow_ids - live_ids
+        if stale:
+            shadow.delete(expr=f"id in [{', '.join(str(i) for i in stale)}]")
+            print(f"Rebuild: removed {len(stale)} rows deleted during the copy")
+
+    def _run(self, mode: str, records: Optional[List[Dict[str, Any]]]):
+        from pymilvus import utility, Collection
+
+        name = f"{self.alias}_v{time.strftime('%Y%m%d%H%M%S')}"
+        started_at = time.time()
+        reencode = mode == "reencode"
+        shadow = None
+        try:
+            self._update(state="creating", version=name)
+            shadow = self.system._create_collection(name)
+            self.system.shadow_collection = shadow
+
+            # Kopya, uzlaştırma, swap ve yeniden oynatma boyunca hiçbir partition release edilmez
+            with self.system.partitions.using_all():
+                self._update(state="loading")
+                if mode in ("copy", "reencode"):
+                    self._load_from_live(shadow, reencode=reencode)
+                elif mode == "records":
+                    self._load_from_records(shadow, records)
+                shadow.flush()
+
+                self._check_cancel()
+                self._update(state="indexing")
+                self.system._create_index(shadow)
+                shadow.load()
+
+                # Başka süreçlerin (kuyruk consumer'ı vb.) rebuild sırasında canlı koleksiyona yazdıkları
+                self._update(state="replaying")
+                replay_at = time.time()
+                replayed, _ = self._catch_up(self.system.collection, shadow, started_at, reencode)
+                if mode in ("copy", "reencode"):
+                    self._reconcile(shadow)
+
+                self._check_cancel()
+                self._update(state="swapping")
+                swapped_at = time.time()
+                previous = self._swap(name)
+
+                # Swap'tan hemen önce eski koleksiyona düşen yazmalar
+                if previous:
+                    old = Collection(previous)
+                    late, dropped = self._catch_up(
+                        old, self.system.collection, replay_at, reencode,
+                        drop_missing_before=swapped_at if mode in ("copy", "reencode") else None)
+                    replayed += late
+                    old.release()
+                    self._update(dropped_after_swap=dropped)
+                self._update(replayed=replayed, swapped_at=swapped_at)
+
+            if mode in ("records", "empty"):
+                self.system.load_skill_index()
+
+            self._update(state="done", previous=previous, finished_at=int(time.time()))
+            print(f"Rebuild finished: {self.alias} -> {name}")
+            self._cleanup(keep={name, previous})
+        except Exception as e:
+            print(f"Rebuild error ({self.alias}): {str(e)}")
+            if shadow is not None and self._resolve_current() != name:
+                utility.drop_collection(name)
+            self._update(state="cancelled" if self._cancel.is_set() else "failed",
+                         error=str(e), finished_at=int(time.time()))
+        finally:
+            self.system.shadow_collection = None
+
+    def _swap(self, name: str) -> Optional[str]:
+        from pymilvus import utility, Collection
+
+        previous = self._resolve_current()
+        if previous == self.alias:
+            # Eski kurulum: alias adıyla gerçek bir koleksiyon var. Milvus, var olan bir
+            # koleksiyonla aynı adda alias'a izin vermez; önce yeniden adlandırmak zorunlu,
+            # bu yüzden iki RPC arasında ad kısa süreliğine çözülmez (sadece ilk geçişte).
+            # Bu süreç yeni koleksiyona hemen geçer; diğer süreçler yeniden dener.
+            self.system.collection = Collection(name)
+            previous = f"{self.alias}_v0"
+            utility.rename_collection(self.alias, previous)
+            utility.create_alias(name, self.alias)
+            self._update(legacy_migration=True)
+        elif previous is None:
+            utility.create_alias(name, self.alias)
+        else:
+            utility.alter_alias(name, self.alias)
+
+        self.system.collection = Collection(self.alias)
+        self.system.partitions.reset(loaded_all=True)
+        return previous
+
+    def _cleanup(self, keep: set):
+        """Drops old versions, keeping the newest keep_versions (and the given ones)"""
+        from pymilvus import utility
+
+        for old in self._versions()[:-self.keep_versions]:
+            if old not in keep:
+                utility.drop_collection(old)
+                print(f"Rebuild: dropped old version {old}")
+
+    def rollback(self) -> Dict[str, Any]:
+        """
+        Cancels a running rebuild, or points the alias back at the version
+        before the current one after replaying the writes made since the swap.
+        """
+        if self.running:
+            self._cancel.set()
+            self._thread.join()
+            return self.get_status()
+
+        from pymilvus import utility, Collection
+
+        current = self._resolve_current()
+        older = [v for v in self._versions() if current is None or v < current]
+        if not older:
+            raise Exception("No previous version to roll back to")
+        previous = older[-1]
+
+        # Swap zamanı / mod sadece bu süreç rebuild'i yaptıysa bilinir; bilinmiyorsa
+        # tüm updated_at'li satırlar yeniden oynatılır ve silmeler uzlaştırılmaz.
+        status = self.get_status()
+        known = status.get("version") == current and status.get("swapped_at")
+        since = status["swapped_at"] if known else 0
+        reconcile_deletes = bool(known) and status.get("mode") in ("copy", "reencode")
+
+        self._update(state="rolling_back")
+        target = Collection(previous)
+        target.load()
+        source = Collection(current) if current else None
+
+        replayed = dropped = 0
+        if source is not None:
+            # Kaynak (şu anki alias) tarama bitene kadar tam yüklü kalır
+            with self.system.partitions.using_all():
+                replay_at = time.time()
+                replayed, dropped = self._catch_up(source, target, since,
+                                                   drop_missing_before=replay_at if reconcile_deletes else None)
+                switched_at = time.time()
+                utility.alter_alias(previous, self.alias)
+                late, late_dropped = self._catch_up(source, target, replay_at,
+                                                    drop_missing_before=switched_at if reconcile_deletes else None)
+                replayed += late
+                dropped += late_dropped
+        else:
+            utility.alter_alias(previous, self.alias)
+
+        self.system.collection = Collection(self.alias)
+        self.system.partitions.reset(loaded_all=True)
+        if source is not None and current != previous:
+            source.release()
+
+        self._update(state="rolled_back", version=previous, previous=current, finished_at=int(time.time()),
+                     replayed=replayed, dropped_after_swap=dropped,
+                     warning=None if reconcile_deletes else
+                     "Deletes made since the swap were not reconciled (rebuild mode or swap time unknown)")
+        print(f"Rollback finished: {self.alias} -> {previous} ({replayed} writes replayed)")
+        return self.get_status()
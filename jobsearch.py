@@ -1,22 +1,46 @@
 import json, math
-from sentence_transformers import SentenceTransformer
-from pymilvus import connections, CollectionSchema, FieldSchema, DataType, Collection, utility
 from typing import Dict, List, Any, Union
 from tqdm import tqdm
 import time
 import os
 import numpy as np
 
+from localvectorstore import LocalCollection
+from modelloader import LazySentenceTransformer
+from partitioning import DEFAULT_PARTITION, PartitionManager
+from skillindex import SkillIndex
+from skillvectors import SkillVectorTable
+
 class JobSearchSystem:
-    def __init__(self, auto_init: bool = True):
-        self.model = SentenceTransformer("all-MiniLM-L12-v2")
+    def __init__(self, auto_init: bool = True, skill_table_path: str = None):
+        self.model = LazySentenceTransformer("all-MiniLM-L12-v2")
         self.collection_name = "job_post_new"
         self.embedding_dim = 384
+        self.backend = os.getenv("VECTOR_BACKEND", "milvus")
+        # Rebuild sırasında yazmalar gölge koleksiyona da uygulanır (bkz. collectionrebuild.py)
+        self.shadow_collection = None
+        # Bölge / tenant bazlı partition'lar (PARTITION_STRATEGY, varsayılan: none)
+        self.partitions = PartitionManager(self)
+
+        # Opsiyonel hızlı yol: önceden hesaplanmış skill vektör tablosu
+        skill_table_path = skill_table_path or os.getenv("SKILL_VECTOR_TABLE")
+        self.skill_table = SkillVectorTable(self.model, skill_table_path, self.embedding_dim) \
+            if skill_table_path else None
+
+        # Hibrit sıralama: semantik skor + ağırlıklı tam skill örtüşmesi (HYBRID_ALPHA=1 sadece semantik)
+        self.skill_index = SkillIndex()
+        self.hybrid_alpha = float(os.getenv("HYBRID_ALPHA", 0.7))
 
         if auto_init:
             self._initialize()
 
     def _initialize(self):
+        if self.backend == "local":
+            self.collection = self._create_local_collection()
+            return
+
+        from pymilvus import connections, utility, Collection
+
         host = os.getenv("MILVUS_HOST", "localhost")
         port = os.getenv("MILVUS_PORT", "19530")
         connections.connect(host=host, port=port)
@@ -34,7 +58,10 @@ class JobSearchSystem:
     def _load_collection_with_retry(self, retries=3, delay=1):
         for i in range(retries):
             try:
-                self.collection.load()
+                if self.partitions.enabled:
+                    self.partitions.ensure_loaded([DEFAULT_PARTITION])
+                else:
+                    self.collection.load()
                 if self._check_collection_loaded():
                     print("Collection loaded successfully")
                     return True
@@ -51,7 +78,9 @@ class JobSearchSystem:
         except:
             return False
 
-    def _create_collection(self):
+    def _create_collection(self, name: str = None):
+        from pymilvus import CollectionSchema, FieldSchema, DataType, Collection
+
         fields = [
             FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
             FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=self.embedding_dim),
@@ -59,26 +88,43 @@ class JobSearchSystem:
             FieldSchema(name="is_deleted", dtype=DataType.BOOL)
         ]
         schema = CollectionSchema(fields, description="Simple Job Seeker Collection")
-        self.collection = Collection(self.collection_name, schema)
-        print(f"Collection created: {self.collection_name}")
+        collection = Collection(name or self.collection_name, schema)
+        print(f"Collection created: {name or self.collection_name}")
 
-    def _create_index(self):
+        if name is None:
+            self.collection = collection
+        return collection
+
+    def warmup(self):
+        """Primes the encoder and the index with one query"""
+        query_vec = self._encode_query(["python", "sql"])
+        # Partition'lar açıksa sadece _default: ısınma tüm partition'ları yüklememeli
+        self.search_vectors([np.asarray(query_vec).tolist()], limit=1, output_fields=["id"],
+                            partition_names=[DEFAULT_PARTITION] if self.partitions.enabled else None)
+
+    def _create_local_collection(self):
+        path = os.getenv("LOCAL_VECTOR_PATH", "./volumes/local")
+        return LocalCollection(self.collection_name, self.embedding_dim, path)
+
+    def _create_index(self, collection=None):
         index_params = {
             "metric_type": "IP",
             "index_type": "IVF_FLAT",
             "params": {"nlist": 256}
         }
-        self.collection.create_index("embedding", index_params)
+        (collection or self.collection).create_index("embedding", index_params)
         print("Vector index created")
 
-    def add_jobs(self, jobs: Union[Dict[str, Any], List[Dict[str, Any]]], batch_size: int = 100) -> bool:
+    def add_jobs(self, jobs: Union[Dict[str, Any], List[Dict[str, Any]]], batch_size: int = 100,
+                 failed: List[Any] = None) -> bool:
         """
         Add job postings to the collection
         Args:
             jobs: Single job dict or list of job dicts
             batch_size: Number of jobs to insert in each batch
+            failed: Optional list that receives the records that could not be inserted
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if every record was inserted, False otherwise
         """
         if not jobs:
             return False
@@ -86,84 +132,167 @@ class JobSearchSystem:
         if isinstance(jobs, dict):
             jobs = [jobs]
 
+        rejected = []
         for i in tqdm(range(0, len(jobs), batch_size), desc="Adding jobs"):
             batch = jobs[i:i + batch_size]
-            if not self._insert_batch(batch):
-                print(f"Failed to add {len(batch)} records")
-
+            batch_rejected = self._insert_batch(batch)
+            if batch_rejected:
+                print(f"Failed to add {len(batch_rejected)} of {len(batch)} records")
+                rejected.extend(batch_rejected)
+
+        if failed is not None:
+            failed.extend(rejected)
+        self._persist()
         self._load_collection_with_retry()
-        return True
+        return not rejected
 
-    def _insert_batch(self, batch: List[Dict[str, Any]]) -> bool:
+    @staticmethod
+    def _is_valid_record(job: Any) -> bool:
+        """Integer id and a non-empty skill list (anything else fails the whole insert call)"""
+        if not isinstance(job, dict):
+            return False
+        entity_id, skills = job.get("id"), job.get("skills")
+        return isinstance(entity_id, int) and not isinstance(entity_id, bool) and \
+            isinstance(skills, list) and bool(skills) and all(isinstance(s, str) for s in skills)
+
+    def _insert_batch(self, batch: List[Dict[str, Any]], collection=None) -> List[Any]:
+        """Inserts one batch, returns the records that were not inserted (invalid ones, or all on a write error)"""
+        # Geçersiz kayıtlar ayrılır, böylece tek bir hatalı kayıt tüm batch'i düşürmez
+        valid_jobs = [job for job in batch if self._is_valid_record(job)]
+        rejected = [job for job in batch if not self._is_valid_record(job)]
         try:
             ids = []
             embeddings = []
             job_data = []
             is_deleted_flags = []
 
-            for job in batch:
-                if not job.get("skills"):
-                    continue
+            if not valid_jobs:
+                return rejected
 
-                # Skill'lerden embedding oluştur
-                skill_text = " ".join(job["skills"])
-                embedding = self.model.encode(skill_text).tolist()  # numpy array'den listeye çevir
+            # Skill'lerden embedding oluştur (tüm batch için tek transformer çağrısı)
+            encoded = self.model.encode([" ".join(job["skills"]) for job in valid_jobs]).tolist()
 
+            now = time.time()
+            for job, embedding in zip(valid_jobs, encoded):
                 ids.append(job["id"])
-                embeddings.append(embedding)  # Bu artık doğru formattta float listesi
+                embeddings.append(embedding)
 
                 job_data.append(json.dumps({
                     "skills": job["skills"],
                     "userId": job.get("userId"),
                     "latitude": job.get("latitude"),
                     "longitude": job.get("longitude"),
+                    "tenantId": job.get("tenantId"),
                     "is_ignored" : False,
+                    # Rebuild yeniden oynatması için (bkz. collectionrebuild.py)
+                    "updated_at": now,
                 }))
 
                 is_deleted_flags.append(job.get("isDeleted", False))
 
             if ids:
                 insert_data = [ids, embeddings, job_data, is_deleted_flags]
-                self.collection.insert(insert_data)
-                return True
+                # Gölge koleksiyona kopyalama ile çakışabileceği için upsert (duplicate PK olmasın)
+                if collection is not None:
+                    for partition_name, part in self.partitions.split(insert_data, valid_jobs):
+                        self.partitions.ensure_partition(partition_name, collection)
+                        collection.upsert(part, partition_name=partition_name)
+                    return rejected
+
+                # Partition'ı değişmiş olabilecek kayıtların (ör. bölge değiştiren) eski satırlarını sil.
+                # Eski partition bu süreçte bilinmeyebilir (başka süreç yazmış olabilir, routes boş
+                # olabilir); primary key ile silme yüklü partition gerektirmez.
+                new_partitions = [self.partitions.partition_for(job) for job in valid_jobs]
+                if self.partitions.enabled:
+                    self.collection.delete(expr=f"id in [{', '.join(str(int(i)) for i in ids)}]")
+
+                for partition_name, part in self.partitions.split(insert_data, valid_jobs):
+                    self.partitions.ensure_partition(partition_name)
+                    self.collection.insert(part, partition_name=partition_name)
+                    if self.shadow_collection is not None:
+                        self.partitions.ensure_partition(partition_name, self.shadow_collection)
+                        self.shadow_collection.upsert(part, partition_name=partition_name)
+                self.partitions.route(ids, new_partitions)
+
+                for job, is_deleted in zip(valid_jobs, is_deleted_flags):
+                    if is_deleted:
+                        self.skill_index.remove(job["id"])
+                    else:
+                        self.skill_index.add(job["id"], job["skills"])
+            return rejected
 
         except Exception as e:
             print(f"Insert error: {str(e)}")
             if batch:
                 print(f"Problematic record: {batch[0]}")
-            return False
+            return list(batch)
 
-    def search_jobs(self, candidate_data: Dict[str, Any]) -> Dict[str, Any]:
-        if not self._check_collection_loaded():
-            self._load_collection_with_retry()
+    def _encode_query(self, skills: List[str], use_skill_table: bool = True) -> np.ndarray:
+        if use_skill_table and self.skill_table is not None and len(self.skill_table) > 0:
+            query_vec = self.skill_table.encode(skills)
+            if query_vec is not None:
+                return query_vec
 
-        # 1. Standardize skills (sorted, lowercase, no whitespace)
-        skills = sorted([str(s).strip().lower() for s in candidate_data["skills"]])
-        print(f"Standardized skills: {skills}")
-
-        # 2. Generate & normalize embedding
         skill_text = " ".join(skills)
         query_vec = self.model.encode(skill_text)
 
         # Normalize the vector (critical for IP/COSINE similarity)
         if np.linalg.norm(query_vec) > 0:  # Avoid division by zero
             query_vec = query_vec / np.linalg.norm(query_vec)
-        query_vec = query_vec.tolist()
+        return query_vec
 
-        print(f"Normalized query vector (first 5): {query_vec[:5]}")
+    def _encode_queries(self, skill_lists: List[List[str]], use_skill_table: bool = True) -> np.ndarray:
+        """Batch version of _encode_query, one transformer call for the whole batch"""
+        if use_skill_table and self.skill_table is not None and len(self.skill_table) > 0:
+            return np.stack([self._encode_query(skills) for skills in skill_lists])
+
+        query_vecs = self.model.encode([" ".join(skills) for skills in skill_lists])
+        norms = np.linalg.norm(query_vecs, axis=1, keepdims=True)
+        return query_vecs / np.where(norms > 0, norms, 1)
+
+    def build_skill_table(self, skills: List[str]):
+        """Precomputes the skill vector table for the given vocabulary"""
+        if self.skill_table is None:
+            raise Exception("SKILL_VECTOR_TABLE path is not configured")
+        self.skill_table.build(skills)
+
+    def search_vectors(self, query_vecs: List[List[float]], limit: int = 250,
+                       output_fields: List[str] = None, partition_names: List[str] = None) -> List[Any]:
+        """Raw ANN search for one or more normalized query vectors (all partitions if partition_names is None)"""
+        if partition_names is not None and not partition_names:
+            return [[] for _ in query_vecs]
 
-        # 3. Search parameters
         search_params = {
-            "data": [query_vec],
+            "data": query_vecs,
             "anns_field": "embedding",
             "param": {"metric_type": "IP", "params": {"nprobe": 16}},
-            "limit": 250,
+            "limit": limit,
             "expr": "is_deleted == false",
-            "output_fields": ["job_data", "id"]
+            "output_fields": output_fields or ["job_data", "id"],
+            "partition_names": partition_names
         }
+        # Arama sürerken partition'lar release edilmez
+        scope = self.partitions.using(partition_names) if partition_names is not None else self.partitions.using_all()
+        with scope:
+            return self.collection.search(**search_params)
+
+    def search_jobs(self, candidate_data: Dict[str, Any], use_skill_table: bool = True) -> Dict[str, Any]:
+        if not self._check_collection_loaded():
+            self._load_collection_with_retry()
+
+        # 1. Standardize skills (sorted, lowercase, no whitespace)
+        skills = sorted([str(s).strip().lower() for s in candidate_data["skills"]])
+        print(f"Standardized skills: {skills}")
+
+        # 2. Generate & normalize embedding
+        query_vec = self._encode_query(skills, use_skill_table).tolist()
 
+        print(f"Normalized query vector (first 5): {query_vec[:5]}")
+
+        # 3. Search
         try:
-            results = self.collection.search(**search_params)
+            partition_names = self.partitions.search_partitions(candidate_data)
+            results = self.search_vectors([query_vec], partition_names=partition_names)
             return {
                 "id": candidate_data.get("id"),
                 "results": self._process_results(results[0], candidate_data)
@@ -182,8 +311,10 @@ class JobSearchSystem:
         candidate_lat = candidate.get("latitude")
         candidate_lon = candidate.get("longitude")
 
+        skill_lists = []
         for hit in hits:
             job = json.loads(hit.entity.get("job_data"))
+            skill_lists.append(job.get("skills") or [])
 
             job_lat = job.get("latitude")
             job_lon = job.get("longitude")
@@ -206,6 +337,23 @@ class JobSearchSystem:
                 "userId": userId,
             })
 
+        return self._hybrid_rerank(candidate.get("skills") or [], processed, skill_lists)
+
+    def _hybrid_rerank(self, skills: List[str], processed: List[Dict[str, Any]],
+                       skill_lists: List[List[str]]) -> List[Dict[str, Any]]:
+        """Combines the semantic score with IDF-weighted exact skill overlap and re-sorts"""
+        if not processed or self.hybrid_alpha >= 1:
+            return processed
+
+        lexical = self.skill_index.overlap_scores(skills, [p["job_id"] for p in processed], skill_lists)
+        semantic = np.fromiter((p["milvus_score"] for p in processed), dtype=np.float64, count=len(processed))
+        hybrid = np.round(self.hybrid_alpha * semantic + (1 - self.hybrid_alpha) * lexical * 100, 1)
+
+        for p, score, overlap in zip(processed, hybrid.tolist(), lexical.tolist()):
+            p["score"] = score
+            p["skill_overlap"] = round(overlap * 100, 1)
+
+        processed.sort(key=lambda x: x["score"], reverse=True)
         return processed
 
     # JobSearchSystem sınıfına bu metodu ekleyin
@@ -213,10 +361,11 @@ class JobSearchSystem:
         """Job post'un is_ignored durumunu günceller"""
         try:
             # Önce mevcut veriyi al
-            result = self.collection.query(
-                expr=f"id == {job_id}",
-                output_fields=["embedding", "job_data", "is_deleted"]
-            )
+            with self.partitions.using_ids([job_id]):
+                result = self.collection.query(
+                    expr=f"id == {job_id}",
+                    output_fields=["embedding", "job_data", "is_deleted"]
+                )
 
             if not result:
                 return False
@@ -226,9 +375,10 @@ class JobSearchSystem:
 
             # Job_data içinde is_ignored alanını güncelle
             job_data["is_ignored"] = is_ignored
+            job_data["updated_at"] = time.time()
 
             # Güncellenmiş veriyi kaydet (TÜM alanları sağla)
-            self.collection.upsert([
+            self._upsert([
                 [job_id],  # id
                 [current_data["embedding"]],  # embedding
                 [json.dumps(job_data)],  # job_data
@@ -243,27 +393,31 @@ class JobSearchSystem:
     def mark_job_as_deleted(self, job_id: int) -> bool:
         try:
             # 1. Önce ilgili job'ı bul
-            result = self.collection.query(
-                expr=f"id == {job_id}",
-                output_fields=["id", "embedding", "job_data"]
-            )
+            with self.partitions.using_ids([job_id]):
+                result = self.collection.query(
+                    expr=f"id == {job_id}",
+                    output_fields=["id", "embedding", "job_data"]
+                )
 
             if not result:
                 print(f"Job {job_id} not found")
                 return False
 
             job = result[0]
+            job_data = json.loads(job["job_data"])
+            job_data["updated_at"] = time.time()
 
             # 2. is_deleted flag'ını True yap
             updated_data = [
                 [job_id],  # id
                 [job["embedding"]],  # embedding (değişmedi)
-                [job["job_data"]],  # job_data (değişmedi)
+                [json.dumps(job_data)],  # job_data
                 [True]  # is_deleted = True
             ]
 
             # 3. Upsert işlemi yap
-            self.collection.upsert(updated_data)
+            self._upsert(updated_data)
+            self.skill_index.remove(job_id)
             print(f"Job {job_id} marked as deleted")
             return True
 
@@ -285,8 +439,74 @@ class JobSearchSystem:
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
         return R * c
 
+    def _persist(self):
+        """Local backend only keeps writes across restarts once they are flushed (appended to its log)"""
+        if self.backend == "local":
+            self.collection.flush()
+
+    def _upsert(self, data: List[List[Any]]):
+        """Single-row update of a stored row; its partition comes from the stored job_data"""
+        partition_name = self.partitions.stored_partition(data[0][0], json.loads(data[2][0]))
+        self.collection.upsert(data, partition_name=partition_name)
+        if self.shadow_collection is not None:
+            self.partitions.ensure_partition(partition_name, self.shadow_collection)
+            self.shadow_collection.upsert(data, partition_name=partition_name)
+        self._persist()
+
+    def delete_ids(self, ids: List[int]):
+        """Deletes by primary key (also from the shadow collection while a rebuild is running)"""
+        expr = f"id in [{', '.join(str(int(i)) for i in ids)}]"
+        self.collection.delete(expr=expr)
+        self.collection.flush()
+        if self.shadow_collection is not None:
+            self.shadow_collection.delete(expr=expr)
+        for entity_id in ids:
+            self.skill_index.remove(int(entity_id))
+        self.partitions.forget(ids)
+
+    def load_skill_index(self, batch_size: int = 1000):
+        """Rebuilds the in-memory skill index from the collection and swaps it in"""
+        index = SkillIndex()
+
+        # Partition'lar tek tek taranır, böylece id -> partition yönlendirmesi de kurulur
+        partition_names = sorted(self.partitions.known_partitions(refresh=True)) if self.partitions.enabled else [None]
+        for partition_name in partition_names:
+            scope = [partition_name] if partition_name else None
+            with self.partitions.using(scope or []):
+                ids = [row["id"] for row in self.collection.query(
+                    expr="is_deleted == false", output_fields=["id"], partition_names=scope)]
+                self.partitions.route(ids, [partition_name] * len(ids))
+
+                for start in range(0, len(ids), batch_size):
+                    chunk = ids[start:start + batch_size]
+                    rows = self.collection.query(
+                        expr=f"id in [{', '.join(str(int(i)) for i in chunk)}]",
+                        output_fields=["id", "job_data"],
+                        partition_names=scope
+                    )
+                    for row in rows:
+                        index.add(row["id"], json.loads(row["job_data"]).get("skills") or [])
+
+        self.skill_index = index
+        print(f"Skill index loaded: {len(index)} entities")
+
+    def get_active_ids(self) -> List[int]:
+        """Silinmemiş tüm kayıtların id listesi"""
+        with self.partitions.using_all():
+            results = self.collection.query(expr="is_deleted == false", output_fields=["id"])
+        return [row["id"] for row in results]
+
     def reset_collection(self):
         """Drops and recreates the collection with the current schema"""
+        if self.backend == "local":
+            self.collection.drop()
+            self.skill_index = SkillIndex()
+            self.partitions.forget(list(self.partitions.routes))
+            print("Collection reset successfully")
+            return
+
+        from pymilvus import utility
+
         if utility.has_collection(self.collection_name):
             utility.drop_collection(self.collection_name)
         self._create_collection()
@@ -296,10 +516,11 @@ class JobSearchSystem:
     def get_job_by_id(self, job_id: int) -> dict:
         """Milvus'tan ID'ye göre job post getirir"""
         try:
-            results = self.collection.query(
-                expr=f"id == {job_id}",
-                output_fields=["job_data", "id"]
-            )
+            with self.partitions.using_ids([job_id]):
+                results = self.collection.query(
+                    expr=f"id == {job_id}",
+                    output_fields=["job_data", "id"]
+                )
             if results:
                 job_data = json.loads(results[0]["job_data"])
                 return {"id": results[0]["id"], **job_data}
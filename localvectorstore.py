@@ -0,0 +1,519 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+DEFAULT_PARTITION = "_default"
+
+
+class LocalHit:
+    def __init__(self, id: int, distance: float, entity: Dict[str, Any]):
+        self.id = id
+        self.distance = distance
+        self.entity = entity
+
+
+class LocalPartition:
+    def __init__(self, name: str):
+        self.name = name
+
+    def load(self, *args, **kwargs):
+        return None
+
+    def release(self, *args, **kwargs):
+        return None
+
+
+class LocalCollection:
+    """
+    Embedded, brute-force replacement for a Milvus collection.
+
+    Implements the part of the pymilvus Collection surface used by
+    JobSearchSystem / JobSeekerSearchSystem (insert, upsert, search, query,
+    delete, flush, load). Vectors are kept L2-normalized in a float32 matrix
+    backed by a memory-mapped file, search is exact (blocked matrix product +
+    argpartition) and deletions only flip a boolean mask until the next
+    compaction. Intended for small deployments (< ~100k entities) and tests.
+
+    flush() appends the rows changed since the previous flush to an
+    append-only log (vectors are already in the memory-mapped file); the
+    full snapshot (ids, flags, job_data) is only rewritten once the log
+    holds more than max(LOCAL_SNAPSHOT_EVERY, size) entries, after a
+    compaction, or on the first flush. The log is replayed on load.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    META_FILE = "meta.npz"
+    DATA_FILE = "job_data.json"
+    LOG_FILE = "log.jsonl"
+
+    def __init__(self, name: str, dim: int, path: Optional[str] = None,
+                 initial_capacity: int = 1024, block_size: int = 16384, snapshot_every: int = None):
+        self.name = name
+        self.dim = dim
+        self.block_size = block_size
+        self.path = os.path.join(path, name) if path else None
+        self.snapshot_every = snapshot_every or int(os.getenv("LOCAL_SNAPSHOT_EVERY", 10000))
+        self._lock = threading.RLock()
+
+        # Son flush'tan beri değişen satırlar ve diskteki log'un durumu
+        self._log: List[Dict[str, Any]] = []
+        self._log_entries = 0
+        self._generation = 0
+        self._needs_snapshot = False
+
+        self._size = 0
+        self._vectors = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._is_deleted = np.zeros(0, dtype=bool)
+        self._alive = np.zeros(0, dtype=bool)
+        self._partition = np.zeros(0, dtype=np.int16)
+        self._partition_names: List[str] = [DEFAULT_PARTITION]
+        self._job_data: List[Optional[str]] = []
+        self._row_of: Dict[int, int] = {}
+
+        if self.path and os.path.exists(os.path.join(self.path, self.META_FILE)):
+            self._load_snapshot()
+        else:
+            self._allocate(initial_capacity)
+
+    # Depolama
+
+    @property
+    def num_entities(self) -> int:
+        return int(self._alive[:self._size].sum())
+
+    @property
+    def capacity(self) -> int:
+        return self._vectors.shape[0]
+
+    def _allocate(self, capacity: int):
+        old_vectors = self._vectors
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            tmp_file = os.path.join(self.path, self.VECTORS_FILE + ".tmp")
+            vectors = np.lib.format.open_memmap(tmp_file, mode="w+", dtype=np.float32, shape=(capacity, self.dim))
+        else:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+
+        if old_vectors is not None and self._size:
+            vectors[:self._size] = old_vectors[:self._size]
+
+        if self.path:
+            vectors.flush()
+            del vectors, old_vectors
+            self._vectors = None
+            os.replace(tmp_file, os.path.join(self.path, self.VECTORS_FILE))
+            vectors = np.load(os.path.join(self.path, self.VECTORS_FILE), mmap_mode="r+")
+
+        self._vectors = vectors
+        self._ids = np.resize(self._ids, capacity)
+        self._is_deleted = np.resize(self._is_deleted, capacity)
+        self._alive = np.resize(self._alive, capacity)
+        self._alive[self._size:] = False
+        self._partition = np.resize(self._partition, capacity)
+        self._job_data.extend([None] * (capacity - len(self._job_data)))
+
+    def _ensure_capacity(self, extra: int):
+        if self._size + extra > self.capacity:
+            self._allocate(max(self.capacity * 2, self._size + extra))
+
+    def _load_snapshot(self):
+        meta = np.load(os.path.join(self.path, self.META_FILE))
+        with open(os.path.join(self.path, self.DATA_FILE), "r", encoding="utf-8") as f:
+            job_data = json.load(f)
+
+        self._vectors = np.load(os.path.join(self.path, self.VECTORS_FILE), mmap_mode="r+")
+        self._size = int(meta["size"])
+        capacity = self._vectors.shape[0]
+        self._ids = np.resize(meta["ids"], capacity)
+        self._is_deleted = np.resize(meta["is_deleted"], capacity)
+        self._alive = np.resize(meta["alive"], capacity)
+        self._alive[self._size:] = False
+        if "partition" in meta:
+            self._partition = np.resize(meta["partition"], capacity)
+            self._partition_names = meta["partition_names"].tolist()
+        else:
+            self._partition = np.zeros(capacity, dtype=np.int16)
+        self._job_data = job_data + [None] * (capacity - len(job_data))
+        self._row_of = {int(self._ids[i]): i for i in range(self._size) if self._alive[i]}
+        self._generation = int(meta["generation"]) if "generation" in meta else 0
+
+        replayed = self._replay_log()
+        if replayed:
+            # Log snapshot'a katlanır; yarım kalmış son satırın arkasına yazılmasın
+            self._save_snapshot()
+        print(f"Local collection loaded: {self.name} ({self.num_entities} entities, {replayed} log entries)")
+
+    def _replay_log(self) -> int:
+        log_file = os.path.join(self.path, self.LOG_FILE)
+        if not os.path.exists(log_file):
+            return 0
+        entries = []
+        with open(log_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Yazılırken kesilmiş son satır
+                    break
+
+        # Başka nesilden log: snapshot alındıktan sonra silinememiş, içeriği snapshot'ta
+        if not entries or entries[0].get("generation") != self._generation:
+            os.remove(log_file)
+            return 0
+        for entry in entries[1:]:
+            self._apply_log_entry(entry)
+        return len(entries) - 1
+
+    def _apply_log_entry(self, entry: Dict[str, Any]):
+        op = entry["op"]
+        if op == "partition":
+            if entry["name"] not in self._partition_names:
+                self._partition_names.append(entry["name"])
+        elif op == "put":
+            row, entity_id = entry["row"], entry["id"]
+            old_row = self._row_of.get(entity_id)
+            if old_row is not None:
+                self._alive[old_row] = False
+            self._ids[row] = entity_id
+            self._job_data[row] = entry["job_data"]
+            self._is_deleted[row] = entry["is_deleted"]
+            self._partition[row] = entry["partition"]
+            self._alive[row] = True
+            self._row_of[entity_id] = row
+            self._size = max(self._size, row + 1)
+        elif op == "kill":
+            for row in entry["rows"]:
+                self._alive[row] = False
+                if self._row_of.get(int(self._ids[row])) == row:
+                    del self._row_of[int(self._ids[row])]
+
+    def _append_log(self):
+        if not self.path or not self._log:
+            return
+        # Log satırları memmap'teki vektörlere işaret eder, önce onlar diske yazılır
+        self._vectors.flush()
+        log_file = os.path.join(self.path, self.LOG_FILE)
+        lines = [] if os.path.exists(log_file) else [json.dumps({"generation": self._generation})]
+        lines.extend(json.dumps(entry, ensure_ascii=False) for entry in self._log)
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self._log_entries += len(self._log)
+        self._log = []
+
+    def _save_snapshot(self):
+        if not self.path:
+            return
+        self._vectors.flush()
+        self._generation += 1
+
+        # Önce geçici dosyaya yaz, sonra atomik olarak değiştir
+        meta_tmp = os.path.join(self.path, "meta.tmp.npz")
+        np.savez(
+            meta_tmp,
+            size=np.int64(self._size),
+            ids=self._ids[:self._size],
+            is_deleted=self._is_deleted[:self._size],
+            alive=self._alive[:self._size],
+            partition=self._partition[:self._size],
+            partition_names=np.array(self._partition_names),
+            generation=np.int64(self._generation)
+        )
+        data_tmp = os.path.join(self.path, self.DATA_FILE + ".tmp")
+        with open(data_tmp, "w", encoding="utf-8") as f:
+            json.dump(self._job_data[:self._size], f, ensure_ascii=False)
+
+        os.replace(data_tmp, os.path.join(self.path, self.DATA_FILE))
+        os.replace(meta_tmp, os.path.join(self.path, self.META_FILE))
+
+        # Snapshot log'u kapsıyor (log'un nesli artık eski)
+        log_file = os.path.join(self.path, self.LOG_FILE)
+        if os.path.exists(log_file):
+            os.remove(log_file)
+        self._log = []
+        self._log_entries = 0
+        self._needs_snapshot = False
+
+    def compact(self):
+        """Drops deleted rows from the matrix"""
+        with self._lock:
+            keep = np.flatnonzero(self._alive[:self._size])
+            n = len(keep)
+            self._vectors[:n] = self._vectors[keep]
+            self._ids[:n] = self._ids[keep]
+            self._is_deleted[:n] = self._is_deleted[keep]
+            self._partition[:n] = self._partition[keep]
+            self._job_data[:n] = [self._job_data[i] for i in keep]
+            self._job_data[n:self._size] = [None] * (self._size - n)
+            self._alive[:n] = True
+            self._alive[n:self._size] = False
+            self._size = n
+            self._row_of = {int(self._ids[i]): i for i in range(n)}
+            # Satır numaraları değişti, bekleyen log kayıtları geçersiz
+            self._log = []
+            self._needs_snapshot = True
+
+    # Milvus Collection yüzeyi
+
+    def load(self, *args, **kwargs):
+        return None
+
+    def release(self, *args, **kwargs):
+        return None
+
+    def has_index(self, *args, **kwargs) -> bool:
+        return True
+
+    def create_index(self, *args, **kwargs):
+        return None
+
+    @property
+    def partitions(self) -> List[LocalPartition]:
+        return [LocalPartition(name) for name in self._partition_names]
+
+    def has_partition(self, name: str) -> bool:
+        return name in self._partition_names
+
+    def create_partition(self, name: str):
+        with self._lock:
+            if name not in self._partition_names:
+                self._partition_names.append(name)
+                if self.path:
+                    self._log.append({"op": "partition", "name": name})
+        return LocalPartition(name)
+
+    def partition(self, name: str) -> Optional[LocalPartition]:
+        return LocalPartition(name) if self.has_partition(name) else None
+
+    def _partition_mask(self, partition_names: Optional[List[str]]) -> Optional[np.ndarray]:
+        if partition_names is None:
+            return None
+        codes = [self._partition_names.index(name) for name in partition_names if name in self._partition_names]
+        return np.isin(self._partition[:self._size], codes)
+
+    def flush(self, *args, **kwargs):
+        with self._lock:
+            dead = self._size - self.num_entities
+            if self._size and dead / self._size > 0.5:
+                self.compact()
+            if not self.path:
+                return
+            log_too_long = self._log_entries + len(self._log) > max(self.snapshot_every, self._size)
+            if self._needs_snapshot or log_too_long or not os.path.exists(os.path.join(self.path, self.META_FILE)):
+                self._save_snapshot()
+            else:
+                self._append_log()
+
+    def drop(self):
+        with self._lock:
+            self._size = 0
+            self._row_of = {}
+            self._alive[:] = False
+            self._job_data = [None] * self.capacity
+            self._log = []
+            self._log_entries = 0
+            if self.path:
+                for name in (self.META_FILE, self.DATA_FILE, self.LOG_FILE):
+                    file = os.path.join(self.path, name)
+                    if os.path.exists(file):
+                        os.remove(file)
+
+    def insert(self, data: List[List[Any]], partition_name: Optional[str] = None, **kwargs):
+        """data: [ids, embeddings, job_data, is_deleted] column lists, like Milvus"""
+        ids, embeddings, job_data, is_deleted = data
+        partition_name = partition_name or DEFAULT_PARTITION
+        if partition_name not in self._partition_names:
+            raise ValueError(f"Partition not found: {partition_name}")
+        partition_code = self._partition_names.index(partition_name)
+        if not len(ids):
+            return None
+
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1)
+
+        with self._lock:
+            self._ensure_capacity(len(ids))
+            for i, entity_id in enumerate(ids):
+                entity_id = int(entity_id)
+                old_row = self._row_of.get(entity_id)
+                if old_row is not None:
+                    self._alive[old_row] = False
+
+                row = self._size
+                self._vectors[row] = vectors[i]
+                self._ids[row] = entity_id
+                self._job_data[row] = job_data[i]
+                self._is_deleted[row] = bool(is_deleted[i])
+                self._partition[row] = partition_code
+                self._alive[row] = True
+                self._row_of[entity_id] = row
+                self._size += 1
+                if self.path:
+                    self._log.append({"op": "put", "row": row, "id": entity_id, "job_data": job_data[i],
+                                      "is_deleted": bool(is_deleted[i]), "partition": partition_code})
+        return None
+
+    # Aynı primary key'e sahip satırı değiştirir
+    upsert = insert
+
+    def delete(self, expr: str, partition_name: Optional[str] = None, **kwargs):
+        with self._lock:
+            mask = self._filter(expr)
+            if partition_name is not None:
+                mask &= self._partition_mask([partition_name])
+            rows = np.flatnonzero(mask)
+            self._alive[rows] = False
+            for row in rows:
+                self._row_of.pop(int(self._ids[row]), None)
+            if self.path and len(rows):
+                self._log.append({"op": "kill", "rows": rows.tolist()})
+        return None
+
+    def query(self, expr: str, output_fields: List[str] = None, limit: int = None, offset: int = 0,
+              partition_names: List[str] = None, **kwargs) -> List[Dict[str, Any]]:
+        output_fields = output_fields or ["id"]
+        with self._lock:
+            mask = self._filter(expr)
+            if partition_names is not None:
+                mask &= self._partition_mask(partition_names)
+            rows = np.flatnonzero(mask)
+            rows = rows[offset:offset + limit] if limit else rows[offset:]
+            return [self._entity(row, output_fields) for row in rows]
+
+    def search(self, data: List[List[float]], anns_field: str = "embedding", param: Dict[str, Any] = None,
+               limit: int = 10, expr: str = None, output_fields: List[str] = None,
+               partition_names: List[str] = None, **kwargs) -> List[List[LocalHit]]:
+        output_fields = output_fields or []
+        queries = np.asarray(data, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1)
+
+        with self._lock:
+            mask = self._filter(expr)
+            if partition_names is not None:
+                mask &= self._partition_mask(partition_names)
+            top_rows, top_scores = self._top_k(queries, mask, limit)
+
+            return [
+                [
+                    LocalHit(int(self._ids[row]), float(score), self._entity(row, output_fields))
+                    for row, score in zip(rows, scores)
+                ]
+                for rows, scores in zip(top_rows, top_scores)
+            ]
+
+    def _top_k(self, queries: np.ndarray, mask: np.ndarray, k: int):
+        nq = queries.shape[0]
+        if k <= 0:
+            return [np.zeros(0, dtype=np.int64)] * nq, [np.zeros(0, dtype=np.float32)] * nq
+
+        best_rows = np.zeros((nq, 0), dtype=np.int64)
+        best_scores = np.zeros((nq, 0), dtype=np.float32)
+
+        # Seçici filtrelerde (ör. partition) sadece ilgili satırlar skorlanır
+        selected = np.flatnonzero(mask)
+        sparse = len(selected) < self._size // 2
+        total = len(selected) if sparse else self._size
+
+        # Blok blok skorla, her blokta sadece top-k adayı tut
+        for start in range(0, total, self.block_size):
+            end = min(start + self.block_size, total)
+            if sparse:
+                rows = selected[start:end]
+                scores = queries @ self._vectors[rows].T
+            else:
+                block_mask = mask[start:end]
+                if not block_mask.any():
+                    continue
+                rows = np.arange(start, end)
+                scores = queries @ self._vectors[start:end].T
+                scores[:, ~block_mask] = -np.inf
+
+            kk = min(k, end - start)
+            part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            best_rows = np.concatenate([best_rows, rows[part]], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+
+            if best_rows.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+        valid = np.isfinite(best_scores)
+        return [r[v] for r, v in zip(best_rows, valid)], [s[v] for s, v in zip(best_scores, valid)]
+
+    def _entity(self, row: int, output_fields: List[str]) -> Dict[str, Any]:
+        entity = {}
+        for field in output_fields:
+            if field == "id":
+                entity["id"] = int(self._ids[row])
+            elif field == "embedding":
+                entity["embedding"] = self._vectors[row].tolist()
+            elif field == "job_data":
+                entity["job_data"] = self._job_data[row]
+            elif field == "is_deleted":
+                entity["is_deleted"] = bool(self._is_deleted[row])
+        return entity
+
+    # Filtre ifadeleri: "id >= 0", "id == 5", "id in [1, 2]", "is_deleted == false", "... and ..."
+
+    _COMPARE = re.compile(r"^(\w+)\s*(==|!=|>=|<=|>|<)\s*(\S+)$")
+    _IN = re.compile(r"^(\w+)\s+(not\s+in|in)\s*\[(.*)\]$")
+
+    def _column(self, field: str) -> np.ndarray:
+        if field == "id":
+            return self._ids[:self._size]
+        if field == "is_deleted":
+            return self._is_deleted[:self._size]
+        raise ValueError(f"Unsupported filter field: {field}")
+
+    @staticmethod
+    def _literal(value: str):
+        value = value.strip()
+        if value.lower() in ("true", "false"):
+            return value.lower() == "true"
+        return int(value)
+
+    def _filter(self, expr: Optional[str]) -> np.ndarray:
+        mask = self._alive[:self._size].copy()
+        if not expr:
+            return mask
+
+        for clause in re.split(r"\s+(?:and|&&)\s+", expr.strip()):
+            clause = clause.strip().strip("()").strip()
+            match = self._IN.match(clause)
+            if match:
+                field, op, values = match.groups()
+                values = [self._literal(v) for v in values.split(",") if v.strip()]
+                clause_mask = np.isin(self._column(field), values)
+                mask &= ~clause_mask if op.startswith("not") else clause_mask
+                continue
+
+            match = self._COMPARE.match(clause)
+            if not match:
+                raise ValueError(f"Unsupported filter expression: {expr}")
+            field, op, value = match.groups()
+            column, value = self._column(field), self._literal(value)
+            if op == "==":
+                mask &= column == value
+            elif op == "!=":
+                mask &= column != value
+            elif op == ">=":
+                mask &= column >= value
+            elif op == "<=":
+                mask &= column <= value
+            elif op == ">":
+                mask &= column > value
+            else:
+                mask &= column < value
+        return mask
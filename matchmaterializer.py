@@ -0,0 +1,300 @@
+import argparse
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+class MatchMaterializer:
+    """
+    Precomputed top-N matches kept in Redis sorted sets.
+
+    Keys (side is "seeker" or "job", the anchor of the match list):
+        matches:{side}:{id}          ZSET  candidate_id -> score
+        matches:detail:{side}:{id}   HASH  candidate_id -> processed result (json)
+        matches:in:{side}:{id}       SET   other-side anchors whose list contains this id
+        matches:refreshed:{side}     HASH  id -> last refresh (unix time)
+        matches:dirty:{side}         SET   ids whose list must be recomputed
+        matches:new:{side}           SET   inserted ids, fanned out to the other side on refresh
+
+    Write paths only mark entities (on_inserted / on_deleted / on_ignored);
+    the vector work happens in refresh(), which runs batched multi-vector
+    searches from the background job (python matchmaterializer.py).
+    """
+
+    SIDES = ("seeker", "job")
+
+    def __init__(self, job_system, seeker_system, ignore_system, top_n: int = 250,
+                 max_age: int = 3600, batch_size: int = 64):
+        self.job_system = job_system
+        self.seeker_system = seeker_system
+        self.ignore_system = ignore_system
+        self.redis = ignore_system.redis
+        self.top_n = top_n
+        self.max_age = max_age
+        self.batch_size = batch_size
+
+    # Anahtarlar
+
+    @staticmethod
+    def _other(side: str) -> str:
+        return "job" if side == "seeker" else "seeker"
+
+    @staticmethod
+    def _list_key(side: str, entity_id: int) -> str:
+        return f"matches:{side}:{entity_id}"
+
+    @staticmethod
+    def _detail_key(side: str, entity_id: int) -> str:
+        return f"matches:detail:{side}:{entity_id}"
+
+    @staticmethod
+    def _reverse_key(side: str, entity_id: int) -> str:
+        return f"matches:in:{side}:{entity_id}"
+
+    @staticmethod
+    def _refreshed_key(side: str) -> str:
+        return f"matches:refreshed:{side}"
+
+    @staticmethod
+    def _dirty_key(side: str) -> str:
+        return f"matches:dirty:{side}"
+
+    @staticmethod
+    def _new_key(side: str) -> str:
+        return f"matches:new:{side}"
+
+    def _systems(self, side: str):
+        """(anchor_system, candidate_system)"""
+        if side == "seeker":
+            return self.seeker_system, self.job_system
+        return self.job_system, self.seeker_system
+
+    def _ignored(self, side: str, ids: List[int]) -> Dict[int, Set[int]]:
+        if side == "seeker":
+            return self.ignore_system.get_ignored_jobs_for_seekers(ids)
+        return self.ignore_system.get_ignored_seekers_for_jobs(ids)
+
+    # Yazma tarafı olayları
+
+    def on_inserted(self, side: str, ids: Iterable[int]):
+        ids = [int(i) for i in ids]
+        if ids:
+            self.redis.sadd(self._new_key(side), *ids)
+
+    def on_ignored(self, seeker_id: int, job_id: int):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.sadd(self._dirty_key("seeker"), seeker_id)
+        pipe.sadd(self._dirty_key("job"), job_id)
+        pipe.execute()
+
+    def on_deleted(self, side: str, entity_id: int):
+        """Removes the entity from every list that contains it and drops its own list"""
+        other = self._other(side)
+        containing = [int(i) for i in self.redis.smembers(self._reverse_key(side, entity_id))]
+        own = [int(i) for i in self.redis.zrange(self._list_key(side, entity_id), 0, -1)]
+
+        pipe = self.redis.pipeline(transaction=True)
+        for other_id in containing:
+            pipe.zrem(self._list_key(other, other_id), entity_id)
+            pipe.hdel(self._detail_key(other, other_id), entity_id)
+        if containing:
+            pipe.sadd(self._dirty_key(other), *containing)
+        for other_id in own:
+            pipe.srem(self._reverse_key(other, other_id), entity_id)
+        pipe.delete(self._list_key(side, entity_id), self._detail_key(side, entity_id),
+                    self._reverse_key(side, entity_id))
+        pipe.hdel(self._refreshed_key(side), entity_id)
+        pipe.srem(self._dirty_key(side), entity_id)
+        pipe.srem(self._new_key(side), entity_id)
+        pipe.execute()
+
+    # Materialization
+
+    def _fetch(self, system, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        with system.partitions.using_ids(ids):
+            rows = system.collection.query(
+                expr=f"id in [{', '.join(str(int(i)) for i in ids)}] and is_deleted == false",
+                output_fields=["id", "job_data"]
+            )
+        return {row["id"]: {"id": row["id"], **json.loads(row["job_data"])} for row in rows}
+
+    def _search(self, candidate_system, query_vecs: List[List[float]], anchors: List[Dict[str, Any]]):
+        """Multi-vector search, one call per partition scope (same scoping as live search)"""
+        groups: Dict[Any, List[int]] = {}
+        for idx, anchor in enumerate(anchors):
+            scope = candidate_system.partitions.search_partitions(anchor)
+            groups.setdefault(None if scope is None else tuple(scope), []).append(idx)
+
+        hits = [None] * len(anchors)
+        for scope, indices in groups.items():
+            group_hits = candidate_system.search_vectors(
+                [query_vecs[i] for i in indices], limit=self.top_n,
+                partition_names=None if scope is None else list(scope))
+            for i, anchor_hits in zip(indices, group_hits):
+                hits[i] = anchor_hits
+        return hits
+
+    def materialize(self, side: str, ids: Iterable[int]) -> Set[int]:
+        """Recomputes the match lists of the given anchors, returns every candidate id seen"""
+        anchor_system, candidate_system = self._systems(side)
+        ids = [int(i) for i in ids]
+        touched = set()
+
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start:start + self.batch_size]
+            records = self._fetch(anchor_system, batch)
+
+            # Silinmiş / bulunamayan kayıtların listelerini temizle
+            for missing_id in set(batch) - set(records):
+                self.on_deleted(side, missing_id)
+
+            anchors = [i for i in batch if i in records and records[i].get("skills")]
+            results = {i: [] for i in records}
+            if anchors:
+                skill_lists = [sorted([str(s).strip().lower() for s in records[i]["skills"]]) for i in anchors]
+                query_vecs = candidate_system._encode_queries(skill_lists).tolist()
+                hits = self._search(candidate_system, query_vecs, [records[i] for i in anchors])
+                ignored = self._ignored(side, anchors)
+
+                for anchor_id, anchor_hits in zip(anchors, hits):
+                    processed = candidate_system._process_results(anchor_hits, records[anchor_id])
+                    results[anchor_id] = [r for r in processed if r["job_id"] not in ignored[anchor_id]]
+                    touched.update(r["job_id"] for r in processed)
+
+            self._write(side, results)
+
+        return touched
+
+    def _write(self, side: str, results: Dict[int, List[Dict[str, Any]]]):
+        if not results:
+            return
+        other = self._other(side)
+        anchor_ids = list(results.keys())
+
+        read = self.redis.pipeline(transaction=False)
+        for anchor_id in anchor_ids:
+            read.zrange(self._list_key(side, anchor_id), 0, -1)
+        previous = dict(zip(anchor_ids, read.execute()))
+
+        now = int(time.time())
+        pipe = self.redis.pipeline(transaction=True)
+        for anchor_id, matches in results.items():
+            current = {m["job_id"] for m in matches}
+            for old_id in set(map(int, previous[anchor_id])) - current:
+                pipe.srem(self._reverse_key(other, old_id), anchor_id)
+
+            pipe.delete(self._list_key(side, anchor_id), self._detail_key(side, anchor_id))
+            if matches:
+                pipe.zadd(self._list_key(side, anchor_id), {m["job_id"]: m["score"] for m in matches})
+                pipe.hset(self._detail_key(side, anchor_id),
+                          mapping={m["job_id"]: json.dumps(m) for m in matches})
+                for candidate_id in current:
+                    pipe.sadd(self._reverse_key(other, candidate_id), anchor_id)
+            pipe.hset(self._refreshed_key(side), anchor_id, now)
+        pipe.srem(self._dirty_key(side), *anchor_ids)
+        pipe.execute()
+
+    def full_refresh(self):
+        for side in self.SIDES:
+            anchor_system, _ = self._systems(side)
+            started = time.time()
+            with anchor_system.partitions.using_all():
+                ids = anchor_system.get_active_ids()
+                self.materialize(side, ids)
+            print(f"Materialized {len(ids)} {side} match lists in {time.time() - started:.1f}s")
+
+    def refresh(self, max_entities: int = 1000) -> Dict[str, int]:
+        """Incremental refresh: fans out new entities, then recomputes dirty lists"""
+        counts = {}
+        for side in self.SIDES:
+            # Kayıtlar ancak listeleri yazıldıktan sonra çıkarılır; hata olursa sonraki turda tekrar denenir
+            new_ids = [int(i) for i in (self.redis.srandmember(self._new_key(side), max_entities) or [])]
+            if new_ids:
+                # Yeni kaydın kendi listesindeki adaylar, listesi değişebilecek karşı taraf kayıtlarıdır
+                touched = self.materialize(side, new_ids)
+                if touched:
+                    self.redis.sadd(self._dirty_key(self._other(side)), *touched)
+                self.redis.srem(self._new_key(side), *new_ids)
+            counts[f"new_{side}"] = len(new_ids)
+
+        for side in self.SIDES:
+            dirty_ids = [int(i) for i in (self.redis.srandmember(self._dirty_key(side), max_entities) or [])]
+            if dirty_ids:
+                self.materialize(side, dirty_ids)
+            counts[f"dirty_{side}"] = len(dirty_ids)
+        return counts
+
+    # Okuma tarafı
+
+    def get_matches(self, side: str, entity_id: int) -> Optional[Dict[str, Any]]:
+        """Returns the materialized results if fresh, None otherwise (caller falls back to live search)"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hget(self._refreshed_key(side), entity_id)
+        pipe.sismember(self._dirty_key(side), entity_id)
+        pipe.sismember(self._new_key(side), entity_id)
+        pipe.zrevrange(self._list_key(side, entity_id), 0, -1)
+        pipe.hgetall(self._detail_key(side, entity_id))
+        refreshed_at, dirty, new, ordered_ids, details = pipe.execute()
+
+        # Yeniden eklenen (skill'leri değişmiş olabilecek) kayıt, arka plan işi çalışana kadar taze sayılmaz
+        if refreshed_at is None or dirty or new:
+            return None
+        staleness = int(time.time()) - int(refreshed_at)
+        if staleness > self.max_age:
+            return None
+
+        return {
+            "results": [json.loads(details[i]) for i in ordered_ids if i in details],
+            "staleness_seconds": staleness
+        }
+
+
+def main():
+    from IgnoreRelationSystem import IgnoreRelationSystemRedisOptimized
+    from jobsearch import JobSearchSystem
+    from jobseeker import JobSeekerSearchSystem
+
+    parser = argparse.ArgumentParser(description="Background match materialization job")
+    parser.add_argument("--top-n", type=int, default=250)
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between incremental refreshes")
+    parser.add_argument("--full-interval", type=float, default=3600, help="Seconds between full refreshes")
+    parser.add_argument("--once", action="store_true", help="Run one full refresh and exit")
+    parser.add_argument("--max-backoff", type=float, default=30, help="Longest wait after repeated errors")
+    args = parser.parse_args()
+
+    materializer = MatchMaterializer(
+        JobSearchSystem(), JobSeekerSearchSystem(), IgnoreRelationSystemRedisOptimized(),
+        top_n=args.top_n, max_age=int(args.full_interval * 2)
+    )
+
+    def full_refresh():
+        # Hibrit skorların IDF ağırlıkları canlı aramayla aynı olsun diye skill indeksleri baştan yüklenir
+        materializer.job_system.load_skill_index()
+        materializer.seeker_system.load_skill_index()
+        materializer.full_refresh()
+
+    if args.once:
+        full_refresh()
+        return
+
+    last_full = None
+    backoff = 1
+    while True:
+        try:
+            if last_full is None or time.time() - last_full >= args.full_interval:
+                full_refresh()
+                last_full = time.time()
+
+            counts = materializer.refresh()
+            if any(counts.values()):
+                print(f"Incremental refresh: {counts}")
+            backoff = 1
+            time.sleep(args.interval)
+        except Exception as e:
+            print(f"Materializer error, retrying in {backoff}s: {str(e)}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, args.max_backoff)
+
+
+if __name__ == "__main__":
+    main()
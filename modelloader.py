@@ -0,0 +1,36 @@
+import threading
+import time
+
+_models = {}
+_lock = threading.Lock()
+
+
+class LazySentenceTransformer:
+    """
+    Defers importing sentence_transformers and loading the weights until
+    the first encode() (or an explicit load() from the startup thread).
+    Instances with the same model name share one loaded model.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model_name in _models
+
+    def load(self):
+        if self.model_name in _models:
+            return _models[self.model_name]
+
+        with _lock:
+            if self.model_name not in _models:
+                from sentence_transformers import SentenceTransformer
+
+                started = time.time()
+                _models[self.model_name] = SentenceTransformer(self.model_name)
+                print(f"Model loaded: {self.model_name} ({time.time() - started:.1f}s)")
+        return _models[self.model_name]
+
+    def encode(self, *args, **kwargs):
+        return self.load().encode(*args, **kwargs)
@@ -0,0 +1,129 @@
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class MutualMatchSystem:
+    """
+    Two-sided (reciprocal) matching between job seekers and job posts.
+
+    For an anchor entity the candidate set comes from one ANN search, which
+    also returns the candidates' job_data and the semantic similarity (or is
+    given by the caller, then one query fetches their embeddings). Each
+    direction adds its own lexical signal to the shared semantic score:
+        seeker_to_job  share of the seeker's skills the job asks for
+        job_to_seeker  share of the job's skills the seeker has
+    (IDF-weighted, from the candidate side's SkillIndex). The mutual score is
+    their geometric mean. Both sides' ignore sets are applied with one Redis
+    pipeline.
+    """
+
+    def __init__(self, job_system, seeker_system, ignore_system, limit: int = 250,
+                 semantic_weight: float = 0.5):
+        self.job_system = job_system
+        self.seeker_system = seeker_system
+        self.ignore_system = ignore_system
+        self.limit = limit
+        self.semantic_weight = semantic_weight
+
+    @staticmethod
+    def _fetch(system, ids: List[int], with_embedding: bool = False) -> Dict[int, Dict[str, Any]]:
+        if not ids:
+            return {}
+        with system.partitions.using_ids(ids):
+            rows = system.collection.query(
+                expr=f"id in [{', '.join(str(int(i)) for i in ids)}] and is_deleted == false",
+                output_fields=["id", "embedding", "job_data"] if with_embedding else ["id", "job_data"]
+            )
+        return {
+            row["id"]: {
+                "embedding": row.get("embedding"),
+                **json.loads(row["job_data"])
+            }
+            for row in rows
+        }
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+    def _candidates(self, candidate_system, anchor, query_vec, candidate_ids: Optional[List[int]]):
+        """(ids, records, cosine similarities to the query); the search is scoped like live search"""
+        if candidate_ids is None:
+            hits = candidate_system.search_vectors([np.asarray(query_vec).tolist()], limit=self.limit,
+                                                   output_fields=["id", "job_data"],
+                                                   partition_names=candidate_system.partitions.search_partitions(anchor))[0]
+            ids = [hit.id for hit in hits]
+            records = {hit.id: json.loads(hit.entity.get("job_data")) for hit in hits}
+            return ids, records, np.asarray([hit.distance for hit in hits], dtype=np.float64)
+
+        records = self._fetch(candidate_system, candidate_ids, with_embedding=True)
+        ids = list(records.keys())
+        if not ids:
+            return [], {}, np.zeros(0)
+        embeddings = self._normalize(np.asarray([records[i]["embedding"] for i in ids], dtype=np.float32))
+        query = self._normalize(np.asarray(query_vec, dtype=np.float32))
+        return ids, records, (embeddings @ query).astype(np.float64)
+
+    def _mutual(self, anchor_system, candidate_system, anchor_id: int, anchor_is_seeker: bool,
+                candidate_ids: Optional[List[int]] = None) -> Optional[List[Dict[str, Any]]]:
+        anchor = self._fetch(anchor_system, [anchor_id]).get(anchor_id)
+        if not anchor:
+            return None
+
+        skills = sorted([str(s).strip().lower() for s in anchor.get("skills", [])])
+        query_vec = candidate_system._encode_query(skills)
+
+        # 1. Aday kümesi ve semantik benzerlik: verilmediyse tek bir ANN araması
+        ids, candidates, similarities = self._candidates(candidate_system, anchor, query_vec, candidate_ids)
+        if not ids:
+            return []
+
+        # 2. Yöne göre skill kapsaması (anchor'ın skill'lerinin payı / adayın skill'lerinin payı)
+        anchor_coverage, candidate_coverage = candidate_system.skill_index.coverage_scores(
+            skills, ids, [candidates[i].get("skills") or [] for i in ids])
+        seeker_coverage, job_coverage = (anchor_coverage, candidate_coverage) if anchor_is_seeker \
+            else (candidate_coverage, anchor_coverage)
+
+        semantic = (similarities + 1) / 2 * 100
+        w = self.semantic_weight
+        seeker_to_job = np.round(w * semantic + (1 - w) * seeker_coverage * 100, 1)
+        job_to_seeker = np.round(w * semantic + (1 - w) * job_coverage * 100, 1)
+        mutual = np.round(np.sqrt(seeker_to_job * job_to_seeker), 1)
+
+        # 3. İki tarafın ignore kümeleri tek pipeline'da
+        pairs = [(anchor_id, i) if anchor_is_seeker else (i, anchor_id) for i in ids]
+        ignored = self.ignore_system.get_ignored_pairs(pairs)
+
+        matches = []
+        for idx, (pair, candidate_id) in enumerate(zip(pairs, ids)):
+            if pair in ignored:
+                continue
+
+            candidate = candidates[candidate_id]
+            if anchor.get("latitude") and anchor.get("longitude") and \
+                    candidate.get("latitude") and candidate.get("longitude"):
+                radius = round(candidate_system._haversine_distance(
+                    anchor["latitude"], anchor["longitude"], candidate["latitude"], candidate["longitude"]), 2)
+            else:
+                radius = 0
+
+            matches.append({
+                "job_seeker_id": pair[0],
+                "job_post_id": pair[1],
+                "score": float(mutual[idx]),
+                "seeker_to_job_score": float(seeker_to_job[idx]),
+                "job_to_seeker_score": float(job_to_seeker[idx]),
+                "radius_km": radius,
+                "userId": candidate.get("userId"),
+            })
+
+        return sorted(matches, key=lambda x: x["score"], reverse=True)
+
+    def matches_for_seeker(self, seeker_id: int, candidate_ids: Optional[List[int]] = None):
+        return self._mutual(self.seeker_system, self.job_system, seeker_id, True, candidate_ids)
+
+    def matches_for_job(self, job_id: int, candidate_ids: Optional[List[int]] = None):
+        return self._mutual(self.job_system, self.seeker_system, job_id, False, candidate_ids)
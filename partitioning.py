@@ -0,0 +1,282 @@
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_PARTITION = "_default"
+
+
+def _cell_index(value: float, cell_degrees: float) -> int:
+    return int(math.floor(value / cell_degrees))
+
+
+def _signed(value: int) -> str:
+    return f"m{-value}" if value < 0 else f"p{value}"
+
+
+def region_partition(cell_lat: int, cell_lon: int) -> str:
+    return f"r_{_signed(cell_lat)}_{_signed(cell_lon)}"
+
+
+def tenant_partition(tenant_id) -> str:
+    return "t_" + re.sub(r"[^0-9a-zA-Z_]", "_", str(tenant_id))
+
+
+class PartitionManager:
+    """
+    Routes entities of a search system to Milvus partitions and keeps only
+    the partitions that are in use loaded.
+
+    PARTITION_STRATEGY:
+        none    one flat collection (default, previous behaviour)
+        region  lat/lon grid cells of PARTITION_CELL_DEGREES; searches target
+                the query's cell and its neighbours
+        tenant  one partition per tenantId; searches target the query's tenant
+    Records without a key go to _default, which region searches always include.
+    Partitions are loaded on first use and released after
+    PARTITION_IDLE_SECONDS without a search (or when more than
+    PARTITION_MAX_LOADED are loaded). Searches and queries hold their
+    partitions with using() / using_ids(); full scans hold using_all(), which
+    suspends releasing until they end. The partition list is cached; a search
+    for a partition missing from it re-reads the list (other processes create
+    partitions too), at most once per PARTITION_REFRESH_SECONDS per name.
+    """
+
+    def __init__(self, system, strategy: str = None, cell_degrees: float = None,
+                 idle_seconds: float = None, max_loaded: int = None, refresh_seconds: float = None):
+        self.system = system
+        self.strategy = strategy or os.getenv("PARTITION_STRATEGY", "none")
+        self.cell_degrees = cell_degrees or float(os.getenv("PARTITION_CELL_DEGREES", 5))
+        self.idle_seconds = idle_seconds or float(os.getenv("PARTITION_IDLE_SECONDS", 900))
+        self.max_loaded = max_loaded or int(os.getenv("PARTITION_MAX_LOADED", 64))
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None \
+            else float(os.getenv("PARTITION_REFRESH_SECONDS", 30))
+
+        self.routes: Dict[int, str] = {}
+        self._loaded: Dict[str, float] = {}
+        self._known = None
+        self._missing: Dict[str, float] = {}
+        self._pins: Dict[str, int] = {}
+        self._full_scans = 0
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.strategy in ("region", "tenant")
+
+    # Anahtar -> partition
+
+    def partition_for(self, record: Dict[str, Any]) -> str:
+        if self.strategy == "tenant":
+            tenant_id = record.get("tenantId")
+            return tenant_partition(tenant_id) if tenant_id is not None else DEFAULT_PARTITION
+
+        if self.strategy == "region":
+            lat, lon = record.get("latitude"), record.get("longitude")
+            if lat is None or lon is None:
+                return DEFAULT_PARTITION
+            return region_partition(_cell_index(lat, self.cell_degrees), _cell_index(lon, self.cell_degrees))
+
+        return DEFAULT_PARTITION
+
+    def stored_partition(self, entity_id: int, job_data: Dict[str, Any]) -> Optional[str]:
+        """Partition of a stored row, from its job_data (routes only for rows stored without tenantId)"""
+        if not self.enabled:
+            return None
+        if self.strategy == "tenant" and "tenantId" not in job_data:
+            return self.routes.get(int(entity_id), DEFAULT_PARTITION)
+        return self.partition_for(job_data)
+
+    def search_partitions(self, candidate: Dict[str, Any]) -> Optional[List[str]]:
+        """Partitions a search for this candidate should target, None for all"""
+        if not self.enabled:
+            return None
+
+        if self.strategy == "tenant":
+            if candidate.get("tenantId") is None:
+                return None
+            names = [tenant_partition(candidate["tenantId"])]
+        else:
+            lat, lon = candidate.get("latitude"), candidate.get("longitude")
+            if lat is None or lon is None:
+                return None
+            cell_lat, cell_lon = _cell_index(lat, self.cell_degrees), _cell_index(lon, self.cell_degrees)
+            # Hücre sınırına yakın adaylar için komşu hücreler de aranır
+            names = [region_partition(cell_lat + dlat, cell_lon + dlon)
+                     for dlat in (-1, 0, 1) for dlon in (-1, 0, 1)]
+            names.append(DEFAULT_PARTITION)
+
+        return self.existing(names)
+
+    # Partition yaşam döngüsü
+
+    def known_partitions(self, refresh: bool = False) -> set:
+        with self._lock:
+            if self._known is None or refresh:
+                self._known = {p.name for p in self.system.collection.partitions}
+            return self._known
+
+    def existing(self, names: Iterable[str]) -> List[str]:
+        """Filters to existing partitions; a name missing from the cache triggers a refresh"""
+        names = list(names)
+        with self._lock:
+            known = self.known_partitions()
+            now = time.time()
+            # Bölgesel aramadaki boş komşu hücreler her seferinde listeyi yeniden okutmasın
+            unseen = [name for name in names if name not in known
+                      and now - self._missing.get(name, 0) > self.refresh_seconds]
+            if unseen:
+                known = self.known_partitions(refresh=True)
+                for name in unseen:
+                    if name not in known:
+                        self._missing[name] = now
+            return [name for name in names if name in known]
+
+    def ensure_partition(self, name: str, collection=None):
+        if name is None or name == DEFAULT_PARTITION:
+            return
+        if collection is not None:
+            if not collection.has_partition(name):
+                collection.create_partition(name)
+            return
+
+        with self._lock:
+            if name in self.known_partitions():
+                return
+            if not self.system.collection.has_partition(name):
+                self.system.collection.create_partition(name)
+                print(f"Partition created: {self.system.collection_name}/{name}")
+            self._known.add(name)
+            self._missing.pop(name, None)
+
+    def _load(self, names: Iterable[str]):
+        """Loads the given partitions and refreshes their last use (caller holds the lock)"""
+        names = list(names)
+        now = time.time()
+        missing = [name for name in names if name not in self._loaded]
+        if missing:
+            self.system.collection.load(partition_names=missing)
+            print(f"Partitions loaded: {self.system.collection_name}/{missing}")
+        for name in names:
+            self._loaded[name] = now
+
+    def ensure_loaded(self, names: Iterable[str]):
+        if not self.enabled:
+            return
+        names = list(names)
+        with self._lock:
+            self._load(names)
+        self.release_idle(keep=names)
+
+    def ensure_all_loaded(self):
+        """Loads every partition without evicting any (full scans should hold using_all())"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._load(sorted(self.known_partitions(refresh=True)))
+
+    @contextmanager
+    def using(self, names: Iterable[str]):
+        """Loads the partitions and keeps them loaded until the block (search / query) ends"""
+        if not self.enabled:
+            yield
+            return
+        names = list(names)
+        with self._lock:
+            self._load(names)
+            for name in names:
+                self._pins[name] = self._pins.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                for name in names:
+                    self._pins[name] -= 1
+                    if not self._pins[name]:
+                        del self._pins[name]
+            self.release_idle()
+
+    @contextmanager
+    def using_all(self):
+        """Full scans (get_active_ids, rebuild copy, full refresh): nothing is released until they end"""
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            self._full_scans += 1
+        try:
+            self.ensure_all_loaded()
+            yield
+        finally:
+            with self._lock:
+                self._full_scans -= 1
+            self.release_idle()
+
+    def using_ids(self, ids: Iterable[int]):
+        """using() for the partitions holding the given ids (all partitions if a route is unknown)"""
+        if not self.enabled:
+            return self.using([])
+        names = set()
+        for entity_id in ids:
+            name = self.routes.get(int(entity_id))
+            if name is None:
+                return self.using_all()
+            names.add(name)
+        return self.using(sorted(names))
+
+    def release_idle(self, keep: Iterable[str] = ()):
+        """Releases partitions idle for idle_seconds or beyond max_loaded, never pinned ones or during full scans"""
+        keep = set(keep)
+        now = time.time()
+        with self._lock:
+            if self._full_scans:
+                return
+            by_age = sorted(self._loaded.items(), key=lambda item: item[1])
+            overflow = len(by_age) - self.max_loaded
+            for i, (name, last_used) in enumerate(by_age):
+                if name == DEFAULT_PARTITION or name in keep or name in self._pins:
+                    continue
+                if now - last_used > self.idle_seconds or i < overflow:
+                    self.system.collection.partition(name).release()
+                    del self._loaded[name]
+                    print(f"Partition released: {self.system.collection_name}/{name}")
+
+    def reset(self, loaded_all: bool = False):
+        """Forgets load state, e.g. after the collection behind the alias changed"""
+        with self._lock:
+            self._known = None
+            self._missing = {}
+            self._loaded = {}
+            if loaded_all:
+                now = time.time()
+                self._loaded = {name: now for name in self.known_partitions()}
+
+    def loaded_partitions(self) -> List[str]:
+        with self._lock:
+            return sorted(self._loaded)
+
+    # Yazma tarafı
+
+    def route(self, ids: Iterable[int], names: Iterable[str]):
+        if self.enabled:
+            self.routes.update(zip((int(i) for i in ids), names))
+
+    def forget(self, ids: Iterable[int]):
+        for entity_id in ids:
+            self.routes.pop(int(entity_id), None)
+
+    def split(self, columns: List[List[Any]], records: List[Dict[str, Any]]) -> List[Tuple[Optional[str], List[List[Any]]]]:
+        """Splits insert columns by target partition"""
+        if not self.enabled:
+            return [(None, columns)]
+
+        groups: Dict[str, List[int]] = {}
+        for i, record in enumerate(records):
+            groups.setdefault(self.partition_for(record), []).append(i)
+        return [
+            (name, [[column[i] for i in rows] for column in columns])
+            for name, rows in groups.items()
+        ]
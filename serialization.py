@@ -0,0 +1,110 @@
+import gzip
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", 65536))
+
+
+def _default(obj):
+    # numpy skaler / dizileri (orjson'suz yol ve orjson'un desteklemediği tipler)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON bytes, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def wants_columnar() -> bool:
+    return request.args.get("layout", "").lower() == "columnar"
+
+
+def columnar(rows: List[Dict[str, Any]], fields: Iterable[str]) -> Dict[str, List[Any]]:
+    """[{a, b}, ...] -> {a: [...], b: [...]} (parallel arrays, keys written once)"""
+    return {field: [row.get(field) for row in rows] for field in fields}
+
+
+def _negotiated_format() -> str:
+    accept = request.accept_mimetypes
+    if msgpack is not None:
+        best = accept.best_match([JSON_MIMETYPE, *MSGPACK_MIMETYPES], default=JSON_MIMETYPE)
+        if best in MSGPACK_MIMETYPES:
+            return "msgpack"
+    return "json"
+
+
+def respond(payload: Any, status: int = 200, compress: bool = True) -> Response:
+    """
+    Serializes an endpoint payload.
+
+    JSON by default; msgpack when the client prefers application/msgpack in
+    Accept (and msgpack is installed). Bodies of at least GZIP_MIN_BYTES are
+    gzip-compressed for clients that accept it.
+    """
+    if _negotiated_format() == "msgpack":
+        body, mimetype = msgpack.packb(payload, default=_default, use_bin_type=True), MSGPACK_MIMETYPES[0]
+    else:
+        body, mimetype = dumps(payload), JSON_MIMETYPE
+
+    response = Response(body, status=status, mimetype=mimetype)
+    response.vary.add("Accept")
+    if compress and len(body) >= GZIP_MIN_BYTES and "gzip" in request.accept_encodings:
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def match_rows(results: List[Dict[str, Any]], id_field: str, ignored: Optional[set] = None) -> List[Dict[str, Any]]:
+    """Search results (already sorted by score) -> response rows, minus ignored ids"""
+    ignored = ignored or set()
+    return [
+        {
+            id_field: match["job_id"],
+            "score": match["score"],
+            "milvus_score": match.get("milvus_score", 0),
+            "radius_km": match.get("radius", 0),
+            "skill_overlap": match.get("skill_overlap"),
+            "userId": match.get("userId"),
+            "is_ignored": match.get("is_ignored")
+        }
+        for match in results if match["job_id"] not in ignored
+    ]
+
+
+def match_columns(results: List[Dict[str, Any]], id_field: str, ignored: Optional[set] = None) -> Dict[str, List[Any]]:
+    """Same as columnar(match_rows(...)), without building the per-match dicts"""
+    ignored = ignored or set()
+    kept = [match for match in results if match["job_id"] not in ignored]
+    return {
+        id_field: [match["job_id"] for match in kept],
+        "score": [match["score"] for match in kept],
+        "milvus_score": [match.get("milvus_score", 0) for match in kept],
+        "radius_km": [match.get("radius", 0) for match in kept],
+        "skill_overlap": [match.get("skill_overlap") for match in kept],
+        "userId": [match.get("userId") for match in kept],
+        "is_ignored": [match.get("is_ignored") for match in kept],
+    }
+
+
+MUTUAL_FIELDS = ("job_seeker_id", "job_post_id", "score", "seeker_to_job_score", "job_to_seeker_score",
+                 "radius_km", "userId")
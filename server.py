@@ -3,14 +3,83 @@ from flask import Flask, request, jsonify
 from IgnoreRelationSystem import IgnoreRelationSystemRedisOptimized
 from jobsearch import JobSearchSystem
 from jobseeker import JobSeekerSearchSystem
+from mutualmatch import MutualMatchSystem
+from matchmaterializer import MatchMaterializer
+from writequeue import InMemoryWriteQueue, RabbitMQWriteQueue, WriteConsumer, WriteStatusStore, make_event
+from startup import StartupManager
+from collectionrebuild import CollectionRebuilder, RebuildInProgressError
+from serialization import MUTUAL_FIELDS, columnar, match_columns, match_rows, respond, wants_columnar
 import time
 import json
+import os
 app = Flask(__name__)
 
-# Sistem örnekleri
-jss = JobSearchSystem()
-jseeker = JobSeekerSearchSystem()
+# Sistem örnekleri (ağır işler aşağıdaki startup thread'lerinde yapılır)
+jss = JobSearchSystem(auto_init=False)
+jseeker = JobSeekerSearchSystem(auto_init=False)
 ignore_system = IgnoreRelationSystemRedisOptimized()
+mutual_system = MutualMatchSystem(jss, jseeker, ignore_system)
+
+# Önceden hesaplanmış eşleşmeler (opsiyonel, arka plan işi: matchmaterializer.py)
+materializer = MatchMaterializer(
+    jss, jseeker, ignore_system, max_age=int(os.getenv("MATCHES_MAX_AGE", 7200))
+) if os.getenv("MATERIALIZED_MATCHES", "0") == "1" else None
+
+# Asenkron yazma yolu (WRITE_QUEUE=rabbitmq: ayrı consumer süreci, memory: süreç içi thread)
+write_status = WriteStatusStore(ignore_system.redis)
+write_queue = None
+if os.getenv("WRITE_QUEUE") == "rabbitmq":
+    write_queue = RabbitMQWriteQueue()
+elif os.getenv("WRITE_QUEUE") == "memory":
+    write_queue = InMemoryWriteQueue()
+    WriteConsumer(jss, jseeker, ignore_system, write_queue, write_status, materializer).start_in_background()
+
+startup = StartupManager()
+startup.register("model", jss.model.load)
+startup.register("job_posts_collection", jss._initialize)
+startup.register("job_seekers_collection", jseeker._initialize)
+startup.register("redis", ignore_system.redis.ping)
+startup.register("job_posts_skill_index", jss.load_skill_index,
+                 depends_on=["job_posts_collection"], required=False)
+startup.register("job_seekers_skill_index", jseeker.load_skill_index,
+                 depends_on=["job_seekers_collection"], required=False)
+startup.register("warmup", lambda: (jss.warmup(), jseeker.warmup()),
+                 depends_on=["model", "job_posts_collection", "job_seekers_collection"])
+startup.start()
+
+HEALTH_PATHS = ("/health", "/health/live", "/health/ready")
+
+
+@app.before_request
+def require_ready():
+    if request.path not in HEALTH_PATHS and not startup.is_ready():
+        return jsonify({"error": "Service is starting", **startup.report()}), 503
+
+
+def _wants_async():
+    return request.args.get("async", "").lower() in ("1", "true") or \
+        "respond-async" in request.headers.get("Prefer", "")
+
+
+def _enqueue(event_type, entity, payload):
+    if write_queue is None:
+        return jsonify({"success": False, "message": "Async writes are not enabled (WRITE_QUEUE)"}), 400
+
+    event = make_event(event_type, entity, payload)
+    write_status.set(event["job_id"], "queued", type=event_type, entity=entity)
+    write_queue.publish(event)
+    return jsonify({"success": True, "job_id": event["job_id"], "status": "queued"}), 202
+
+
+def _materialized_or_live(side, entity_id, search_system, candidate):
+    """Materialized view taze ise oradan, değilse canlı aramadan sonuç döner"""
+    if materializer is not None:
+        cached = materializer.get_matches(side, entity_id)
+        if cached is not None:
+            return cached["results"], "materialized", cached["staleness_seconds"]
+
+    search_results = search_system.search_jobs(candidate)
+    return search_results.get("results", []), "live", None
 
 
 
@@ -24,35 +93,23 @@ def get_job_post_matches(job_post_id):
     # Sadece job_post'un ignore ettiği seekerları al
     ignored_seekers_for_job = set(ignore_system.get_ignored_seekers_for_job(job_post_id))
 
-    search_results = jseeker.search_jobs({
+    results, source, staleness = _materialized_or_live("job", job_post_id, jseeker, {
         "skills": job_post.get("skills", []),
         "latitude": job_post.get("latitude"),
         "longitude": job_post.get("longitude"),
+        "tenantId": job_post.get("tenantId"),
         "id": job_post_id
     })
 
-    matches = []
-    for match in search_results.get("results", []):
-        seeker_id = match["job_id"]  # Burada job_id seeker_id
-
-        # Eğer job_post bu seeker'ı ignore etmişse atla
-        if seeker_id in ignored_seekers_for_job:
-            continue
-
-        matches.append({
-            "job_seeker_id": seeker_id,
-            "score": match["score"],
-            "milvus_score": match.get("milvus_score", 0),
-            "radius_km": match.get("radius", 0),
-            "userId": match.get("userId"),
-            "is_ignored": match.get("is_ignored")
-        })
-
-    sorted_matches = sorted(matches, key=lambda x: x["score"], reverse=True)
+    # Burada job_id seeker_id; sonuçlar skora göre sıralı gelir (canlı arama ve ZSET)
+    rows = match_columns if wants_columnar() else match_rows
+    matches = rows(results, "job_seeker_id", ignored_seekers_for_job)
 
-    return jsonify({
+    return respond({
         "job_post_id": job_post_id,
-        "matches": sorted_matches
+        "matches": matches,
+        "source": source,
+        "staleness_seconds": staleness
     })
 
 
@@ -65,58 +122,97 @@ def get_job_seeker_matches(seeker_id):
     # Sadece seeker'ın ignore ettiği jobları al
     ignored_jobs_for_seeker = set(ignore_system.get_ignored_jobs_for_seeker(seeker_id))
 
-    search_results = jss.search_jobs({
+    results, source, staleness = _materialized_or_live("seeker", seeker_id, jss, {
         "skills": seeker.get("skills", []),
         "latitude": seeker.get("latitude"),
         "longitude": seeker.get("longitude"),
+        "tenantId": seeker.get("tenantId"),
         "id": seeker_id,
         "is_ignored": seeker.get("is_ignored")
     })
 
-    matches = []
-    for match in search_results.get("results", []):
-        job_id = match["job_id"]
-
-        # Eğer seeker bu job'u ignore etmişse atla
-        if job_id in ignored_jobs_for_seeker:
-            continue
-
-        matches.append({
-            "job_post_id": job_id,
-            "score": match["score"],
-            "milvus_score": match.get("milvus_score", 0),
-            "radius_km": match.get("radius", 0),
-            "userId": match.get("userId"),
-            "is_ignored": match.get("is_ignored")
-        })
+    rows = match_columns if wants_columnar() else match_rows
+    matches = rows(results, "job_post_id", ignored_jobs_for_seeker)
+
+    return respond({
+        "job_seeker_id": seeker_id,
+        "matches": matches,
+        "source": source,
+        "staleness_seconds": staleness
+    })
+
 
-    sorted_matches = sorted(matches, key=lambda x: x["score"], reverse=True)
+def _candidate_ids_from_request():
+    """POST body'de opsiyonel candidate_ids listesi"""
+    if request.method != "POST" or not request.is_json:
+        return None
+    body = request.json or {}
+    if not isinstance(body, dict):
+        raise TypeError("request body must be a JSON object")
+    candidate_ids = body.get("candidate_ids")
+    if candidate_ids is None:
+        return None
+    if not isinstance(candidate_ids, list):
+        raise TypeError("candidate_ids must be a list")
+    return [int(i) for i in candidate_ids]
 
-    return jsonify({
+
+@app.route("/matches/mutual/job_seekers/<int:seeker_id>", methods=["GET", "POST"])
+def get_mutual_job_seeker_matches(seeker_id):
+    try:
+        candidate_ids = _candidate_ids_from_request()
+    except (TypeError, ValueError):
+        return jsonify({"error": "Body must be an object with candidate_ids as a list of integers"}), 400
+
+    matches = mutual_system.matches_for_seeker(seeker_id, candidate_ids)
+    if matches is None:
+        return jsonify({"error": "JobSeeker not found"}), 404
+
+    return respond({
         "job_seeker_id": seeker_id,
-        "matches": sorted_matches
+        "matches": columnar(matches, MUTUAL_FIELDS) if wants_columnar() else matches
     })
 
 
+@app.route("/matches/mutual/job_posts/<int:job_post_id>", methods=["GET", "POST"])
+def get_mutual_job_post_matches(job_post_id):
+    try:
+        candidate_ids = _candidate_ids_from_request()
+    except (TypeError, ValueError):
+        return jsonify({"error": "Body must be an object with candidate_ids as a list of integers"}), 400
+
+    matches = mutual_system.matches_for_job(job_post_id, candidate_ids)
+    if matches is None:
+        return jsonify({"error": "JobPost not found"}), 404
+
+    return respond({
+        "job_post_id": job_post_id,
+        "matches": columnar(matches, MUTUAL_FIELDS) if wants_columnar() else matches
+    })
+
 
 # Diğer endpoint'ler
 
 @app.route("/delete/job_seeker/<int:seeker_id>", methods=["POST"])
 def delete_job_seeker(seeker_id):
+    if _wants_async():
+        return _enqueue("delete", "seeker", seeker_id)
+
     try:
         # Query to verify the job seeker exists
-        res = jseeker.collection.query(
-            expr=f"id == {seeker_id}",
-            output_fields=["id"]
-        )
+        with jseeker.partitions.using_ids([seeker_id]):
+            res = jseeker.collection.query(
+                expr=f"id == {seeker_id}",
+                output_fields=["id"]
+            )
 
         if not res:
             return jsonify({"success": False, "message": "Job seeker not found"}), 404
 
-        # Delete using the proper filter expression format
-        delete_expr = f"id in [{seeker_id}]"
-        jseeker.collection.delete(expr=delete_expr)
-        jseeker.collection.flush()
+        jseeker.delete_ids([seeker_id])
+
+        if materializer is not None:
+            materializer.on_deleted("seeker", seeker_id)
 
         return jsonify({
             "success": True,
@@ -134,20 +230,24 @@ def delete_job_seeker(seeker_id):
 
 @app.route("/delete/job_posts/<int:job_post_id>", methods=["POST"])
 def delete_job_post(job_post_id):
+    if _wants_async():
+        return _enqueue("delete", "job", job_post_id)
+
     try:
         # Query to verify the job seeker exists
-        res = jss.collection.query(
-            expr=f"id == {job_post_id}",
-            output_fields=["id"]
-        )
+        with jss.partitions.using_ids([job_post_id]):
+            res = jss.collection.query(
+                expr=f"id == {job_post_id}",
+                output_fields=["id"]
+            )
 
         if not res:
             return jsonify({"success": False, "message": "Job seeker not found"}), 404
 
-        # Delete using the proper filter expression format
-        delete_expr = f"id in [{job_post_id}]"
-        jss.collection.delete(expr=delete_expr)
-        jss.collection.flush()
+        jss.delete_ids([job_post_id])
+
+        if materializer is not None:
+            materializer.on_deleted("job", job_post_id)
 
         return jsonify({
             "success": True,
@@ -179,7 +279,16 @@ def add_ignore():
     except ValueError:
         return jsonify({"error": "seeker_id and job_id must be integers"}), 400
 
+    if _wants_async():
+        return _enqueue("ignore", "relation", {
+            "seeker_id": seeker_id,
+            "job_id": job_id,
+            "is_seeker_initiated": is_seeker_initiated
+        })
+
     updated = ignore_system.add_ignore_relation(seeker_id, job_id, is_seeker_initiated)
+    if updated and materializer is not None:
+        materializer.on_ignored(seeker_id, job_id)
     return jsonify({"success": updated})
 
 
@@ -200,32 +309,108 @@ def get_seekers_for_job(job_id):
 def health():
     return jsonify({"status": "healthy"})
 
+
+@app.route("/health/live")
+def health_live():
+    return jsonify({"status": "alive", **startup.report()})
+
+
+@app.route("/health/ready")
+def health_ready():
+    report = startup.report()
+    return jsonify({"status": "ready" if report["ready"] else "starting", **report}), \
+        200 if report["ready"] else 503
+
+def _add_records(system, kind, records):
+    records = records if isinstance(records, list) else [records]
+    failed = []
+    success = system.add_jobs(records, failed=failed)
+    failed_refs = {id(record) for record in failed}
+    inserted = [record["id"] for record in records if id(record) not in failed_refs]
+    if inserted and materializer is not None:
+        materializer.on_inserted(kind, inserted)
+    if failed:
+        return jsonify({"success": success, "inserted": len(inserted), "failed": len(failed)})
+    return jsonify({"success": success})
+
 @app.route("/job_posts", methods=["POST"])
 def add_job_posts():
     jobs = request.json
     if not jobs:
         return jsonify({"success": False, "message": "Job posts data missing"}), 400
-    return jsonify({"success": jss.add_jobs(jobs)})
+    if _wants_async():
+        return _enqueue("upsert", "job", jobs)
+    return _add_records(jss, "job", jobs)
 
 @app.route("/job_seekers", methods=["POST"])
 def add_job_seekers():
     seekers = request.json
     if not seekers:
         return jsonify({"success": False, "message": "Seekers data missing"}), 400
-    return jsonify({"success": jseeker.add_jobs(seekers)})
+    if _wants_async():
+        return _enqueue("upsert", "seeker", seekers)
+    return _add_records(jseeker, "seeker", seekers)
+
 
+@app.route("/write_jobs/<job_id>", methods=["GET"])
+def get_write_job(job_id):
+    status = write_status.get(job_id)
+    if not status:
+        return jsonify({"error": "Write job not found"}), 404
+    return jsonify(status)
 
 
-# Admin Endpoint'leri
-@app.route("/admin/job_posts/reset", methods=["POST"])
-def reset_job_posts():
-    jss.safe_reset_collection()
-    return jsonify({"success": True})
 
-@app.route("/admin/job_seekers/reset", methods=["POST"])
-def reset_job_seekers():
-    jseeker.safe_reset_collection()
-    return jsonify({"success": True})
+# Admin Endpoint'leri (blue/green rebuild, arama hiç kesilmez)
+rebuilders = {
+    "job_posts": CollectionRebuilder(jss),
+    "job_seekers": CollectionRebuilder(jseeker),
+}
+
+
+def _start_rebuild(kind, mode, records=None):
+    try:
+        status = rebuilders[kind].start(mode, records)
+    except RebuildInProgressError as e:
+        return jsonify({"success": False, "message": str(e), **rebuilders[kind].get_status()}), 409
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({"success": True, **status}), 202
+
+
+@app.route("/admin/<any(job_posts, job_seekers):kind>/reset", methods=["POST"])
+def reset_collection(kind):
+    system = rebuilders[kind].system
+    if system.backend != "milvus":
+        # Alias üzerinden blue/green sadece Milvus'ta; yerel backend yerinde sıfırlanır
+        try:
+            system.reset_collection()
+        except Exception as e:
+            return jsonify({"success": False, "message": str(e)}), 500
+        return jsonify({"success": True, "mode": "in_place"})
+    return _start_rebuild(kind, "empty")
+
+
+@app.route("/admin/<any(job_posts, job_seekers):kind>/rebuild", methods=["POST"])
+def rebuild_collection(kind):
+    body = request.get_json(silent=True) or {}
+    records = body.get("records")
+    mode = "records" if records else body.get("mode", "copy")
+    return _start_rebuild(kind, mode, records)
+
+
+@app.route("/admin/<any(job_posts, job_seekers):kind>/rebuild/status", methods=["GET"])
+def rebuild_status(kind):
+    return jsonify(rebuilders[kind].get_status())
+
+
+@app.route("/admin/<any(job_posts, job_seekers):kind>/rebuild/rollback", methods=["POST"])
+def rebuild_rollback(kind):
+    try:
+        status = rebuilders[kind].rollback()
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({"success": True, **status})
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8181)
\ No newline at end of file
@@ -0,0 +1,150 @@
+import math
+import threading
+from typing import Dict, Iterable, List, Set
+
+import numpy as np
+
+from skillvectors import normalize_skill
+
+
+class SkillIndex:
+    """
+    In-memory inverted index over normalized skills.
+
+    Keeps skill -> entity postings, document frequencies and every entity's
+    skill ids as a small int32 array, so lexical scoring of an ANN candidate
+    set is a handful of vectorized numpy calls. Skills are matched exactly
+    after normalization ("java" never matches "javascript"). A fingerprint
+    of each entity's raw skill list tells whether a candidate's current
+    skills still match what was indexed, without normalizing them again.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.vocab: Dict[str, int] = {}
+        self.postings: Dict[int, Set[int]] = {}
+        self.entity_skills: Dict[int, np.ndarray] = {}
+        self._fingerprints: Dict[int, int] = {}
+        self._df = np.zeros(0, dtype=np.float32)
+        self._idf = None
+
+    def __len__(self) -> int:
+        return len(self.entity_skills)
+
+    def __contains__(self, entity_id) -> bool:
+        return entity_id in self.entity_skills
+
+    def _skill_ids(self, skills: Iterable[str], create: bool = False) -> np.ndarray:
+        ids = set()
+        for skill in skills:
+            skill = normalize_skill(skill)
+            if not skill:
+                continue
+            skill_id = self.vocab.get(skill)
+            if skill_id is None and create:
+                skill_id = self.vocab[skill] = len(self.vocab)
+            if skill_id is not None:
+                ids.add(skill_id)
+        return np.fromiter(ids, dtype=np.int32, count=len(ids))
+
+    @staticmethod
+    def _fingerprint(skills) -> int:
+        return hash(tuple(skills or ()))
+
+    def add(self, entity_id: int, skills: Iterable[str]):
+        skills = tuple(skills or ())
+        with self._lock:
+            self.remove(entity_id)
+            skill_ids = self._skill_ids(skills, create=True)
+            self._fingerprints[entity_id] = self._fingerprint(skills)
+            if len(self.vocab) > len(self._df):
+                self._df = np.concatenate([self._df, np.zeros(len(self.vocab) - len(self._df), dtype=np.float32)])
+
+            self.entity_skills[entity_id] = skill_ids
+            for skill_id in skill_ids.tolist():
+                self.postings.setdefault(skill_id, set()).add(entity_id)
+            self._df[skill_ids] += 1
+            self._idf = None
+
+    def remove(self, entity_id: int):
+        with self._lock:
+            skill_ids = self.entity_skills.pop(entity_id, None)
+            self._fingerprints.pop(entity_id, None)
+            if skill_ids is None:
+                return
+            for skill_id in skill_ids.tolist():
+                self.postings.get(skill_id, set()).discard(entity_id)
+            self._df[skill_ids] -= 1
+            self._idf = None
+
+    def candidates(self, skills: Iterable[str]) -> Set[int]:
+        """Entities sharing at least one skill with the query"""
+        result = set()
+        for skill_id in self._skill_ids(skills).tolist():
+            result |= self.postings.get(skill_id, set())
+        return result
+
+    def _idf_weights(self) -> np.ndarray:
+        # BM25 idf: log((N - df + 0.5) / (df + 0.5) + 1), her zaman pozitif
+        idf = self._idf
+        if idf is None or len(idf) != len(self._df):
+            n = len(self.entity_skills)
+            idf = np.log((n - self._df + 0.5) / (self._df + 0.5) + 1).astype(np.float32)
+            self._idf = idf
+        return idf
+
+    def _overlap_weights(self, query_skills: Iterable[str], candidate_ids: List[int],
+                         candidate_skills: List[List[str]] = None):
+        """(overlap, query_weight, candidate_weight): IDF-weighted intersection and set sizes per candidate"""
+        query_skills = {normalize_skill(s) for s in query_skills if normalize_skill(s)}
+        zeros = np.zeros(len(candidate_ids), dtype=np.float64)
+        if not candidate_ids or not query_skills:
+            return zeros, 0.0, zeros
+
+        with self._lock:
+            if candidate_skills is not None:
+                # Sadece parmak izi değişen (ya da hiç indekslenmemiş) adaylar yeniden indekslenir
+                fingerprints, fingerprint = self._fingerprints, self._fingerprint
+                for entity_id, skills in zip(candidate_ids, candidate_skills):
+                    if fingerprints.get(entity_id) != fingerprint(skills):
+                        self.add(entity_id, skills)
+
+            idf = self._idf_weights()
+            query_ids = self._skill_ids(query_skills)
+            unseen_weight = math.log((len(self.entity_skills) + 0.5) / 0.5 + 1)
+            query_weight = float(idf[query_ids].sum()) + (len(query_skills) - len(query_ids)) * unseen_weight
+
+            arrays = [self.entity_skills.get(entity_id, np.zeros(0, dtype=np.int32)) for entity_id in candidate_ids]
+
+        lengths = np.fromiter((len(a) for a in arrays), dtype=np.int64, count=len(arrays))
+        flat = np.concatenate(arrays) if lengths.sum() else np.zeros(0, dtype=np.int32)
+        segments = np.repeat(np.arange(len(arrays)), lengths)
+        weights = idf[flat]
+
+        candidate_weight = np.bincount(segments, weights=weights, minlength=len(arrays))
+        overlap = np.bincount(segments, weights=weights * np.isin(flat, query_ids), minlength=len(arrays))
+        return overlap, query_weight, candidate_weight
+
+    def overlap_scores(self, query_skills: Iterable[str], candidate_ids: List[int],
+                       candidate_skills: List[List[str]] = None) -> np.ndarray:
+        """
+        IDF-weighted Jaccard between the query skills and each candidate, in [0, 1].
+        candidate_skills (the hits' current job_data skills) re-index candidates that are
+        missing or whose indexed skills differ, e.g. after an update made by another process.
+        """
+        overlap, query_weight, candidate_weight = self._overlap_weights(query_skills, candidate_ids, candidate_skills)
+        union = candidate_weight + query_weight - overlap
+        return np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+
+    def coverage_scores(self, query_skills: Iterable[str], candidate_ids: List[int],
+                        candidate_skills: List[List[str]] = None):
+        """
+        Directional overlap, both in [0, 1]:
+            query_coverage      share of the query's skills each candidate has
+            candidate_coverage  share of each candidate's skills the query has
+        """
+        overlap, query_weight, candidate_weight = self._overlap_weights(query_skills, candidate_ids, candidate_skills)
+        query_coverage = overlap / query_weight if query_weight > 0 else np.zeros_like(overlap)
+        candidate_coverage = np.divide(overlap, candidate_weight, out=np.zeros_like(overlap),
+                                       where=candidate_weight > 0)
+        return query_coverage, candidate_coverage
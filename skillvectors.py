@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+def normalize_skill(skill) -> str:
+    return str(skill).strip().lower()
+
+
+class SkillVectorTable:
+    """
+    Precomputed per-skill embedding table.
+
+    Skill vocabulary is finite, so every normalized skill is encoded once and
+    stored in a memory-mapped float32 matrix. Query vectors are composed by
+    mean-pooling the rows of the requested skills; only unseen skills go
+    through the transformer (the last max_unseen of them are kept in an LRU).
+    """
+
+    VECTORS_FILE = "skill_vectors.npy"
+    VOCAB_FILE = "skill_vocab.json"
+
+    def __init__(self, model, path: str, embedding_dim: int = 384, cache_unseen: bool = True,
+                 max_unseen: int = 10000):
+        self.model = model
+        self.path = path
+        self.embedding_dim = embedding_dim
+        self.cache_unseen = cache_unseen
+        self.max_unseen = max_unseen
+
+        self.vectors = np.zeros((0, embedding_dim), dtype=np.float32)
+        self.vocab: Dict[str, int] = {}
+        self._unseen: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._unseen_lock = threading.Lock()
+
+        if os.path.exists(os.path.join(path, self.VECTORS_FILE)):
+            self.load()
+
+    def load(self):
+        with open(os.path.join(self.path, self.VOCAB_FILE), "r", encoding="utf-8") as f:
+            skills = json.load(f)
+
+        self.vectors = np.load(os.path.join(self.path, self.VECTORS_FILE), mmap_mode="r")
+        self.vocab = {skill: i for i, skill in enumerate(skills)}
+        self._unseen = OrderedDict()
+        print(f"Skill vector table loaded: {len(self.vocab)} skills")
+
+    def build(self, skills: Iterable[str], batch_size: int = 256):
+        """Encodes the whole vocabulary and writes it to disk as a memory-mapped matrix"""
+        vocab = sorted({normalize_skill(s) for s in skills if normalize_skill(s)})
+        os.makedirs(self.path, exist_ok=True)
+
+        # Canlı dosya başka tablolar tarafından map'lenmiş olabilir: geçici dosyaya yaz, sonra değiştir
+        vectors_file = os.path.join(self.path, self.VECTORS_FILE)
+        vocab_file = os.path.join(self.path, self.VOCAB_FILE)
+        vectors = np.lib.format.open_memmap(
+            vectors_file + ".tmp",
+            mode="w+",
+            dtype=np.float32,
+            shape=(len(vocab), self.embedding_dim)
+        )
+        for i in range(0, len(vocab), batch_size):
+            vectors[i:i + batch_size] = self.model.encode(
+                vocab[i:i + batch_size], normalize_embeddings=True
+            )
+        vectors.flush()
+        del vectors
+
+        with open(vocab_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+
+        os.replace(vectors_file + ".tmp", vectors_file)
+        os.replace(vocab_file + ".tmp", vocab_file)
+        self.load()
+
+    def __contains__(self, skill) -> bool:
+        return normalize_skill(skill) in self.vocab
+
+    def __len__(self) -> int:
+        return len(self.vocab)
+
+    def _lookup(self, skills: List[str]) -> np.ndarray:
+        known = [self.vocab[s] for s in skills if s in self.vocab]
+        unseen = [s for s in skills if s not in self.vocab]
+        # Önbellekten okunanlar eviction'dan önce alınır
+        with self._unseen_lock:
+            found = {s: self._unseen[s] for s in unseen if s in self._unseen}
+            for s in found:
+                self._unseen.move_to_end(s)
+        missing = [s for s in unseen if s not in found]
+
+        # Sözlükte olmayan skill'ler için tek seferde transformer çağrısı
+        if missing:
+            encoded = self.model.encode(missing, normalize_embeddings=True)
+            encoded = np.asarray(encoded, dtype=np.float32).reshape(len(missing), self.embedding_dim)
+            extra = dict(zip(missing, encoded))
+            found.update(extra)
+            if self.cache_unseen:
+                with self._unseen_lock:
+                    self._unseen.update(extra)
+                    while len(self._unseen) > self.max_unseen:
+                        self._unseen.popitem(last=False)
+
+        parts = []
+        if known:
+            parts.append(np.asarray(self.vectors[known]))
+        if unseen:
+            parts.append(np.stack([found[s] for s in unseen]))
+
+        return np.concatenate(parts, axis=0)
+
+    def encode(self, skills: Iterable[str]) -> Optional[np.ndarray]:
+        """Returns the L2-normalized mean of the skill vectors, None if there are no skills"""
+        normalized = sorted({normalize_skill(s) for s in skills if normalize_skill(s)})
+        if not normalized:
+            return None
+
+        pooled = self._lookup(normalized).mean(axis=0)
+        norm = np.linalg.norm(pooled)
+        if norm > 0:
+            pooled = pooled / norm
+        return pooled.astype(np.float32)
+
+    def coverage(self, skills: Iterable[str]) -> float:
+        normalized = {normalize_skill(s) for s in skills if normalize_skill(s)}
+        if not normalized:
+            return 1.0
+        return sum(1 for s in normalized if s in self.vocab) / len(normalized)
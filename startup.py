@@ -0,0 +1,86 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+
+class StartupManager:
+    """
+    Staged, non-blocking startup.
+
+    Every component runs in its own background thread once its dependencies
+    are ready, and is retried with exponential backoff until it succeeds, so
+    a dependency that is briefly down (Milvus, Redis) delays readiness
+    instead of crashing the process.
+    """
+
+    PENDING = "pending"
+    STARTING = "starting"
+    READY = "ready"
+    RETRYING = "retrying"
+
+    def __init__(self, max_backoff: float = 30):
+        self.max_backoff = max_backoff
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+
+    def register(self, name: str, fn: Callable[[], Any], depends_on: Iterable[str] = (), required: bool = True):
+        self._components[name] = {
+            "fn": fn,
+            "depends_on": list(depends_on),
+            "required": required,
+            "ready_event": threading.Event(),
+            "state": self.PENDING,
+            "attempts": 0,
+            "error": None,
+            "duration_seconds": None,
+        }
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._components[name].update(fields)
+
+    def _run(self, name: str):
+        component = self._components[name]
+        for dependency in component["depends_on"]:
+            self._components[dependency]["ready_event"].wait()
+
+        delay = 1
+        while True:
+            self._set(name, state=self.STARTING, attempts=component["attempts"] + 1)
+            started = time.time()
+            try:
+                component["fn"]()
+                self._set(name, state=self.READY, error=None, duration_seconds=round(time.time() - started, 2))
+                component["ready_event"].set()
+                print(f"Startup: {name} ready ({time.time() - started:.1f}s)")
+                return
+            except Exception as e:
+                self._set(name, state=self.RETRYING, error=str(e))
+                print(f"Startup: {name} failed (attempt {component['attempts']}), retrying in {delay}s: {str(e)}")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+    def start(self):
+        for name in self._components:
+            threading.Thread(target=self._run, args=(name,), name=f"startup-{name}", daemon=True).start()
+
+    def is_ready(self) -> bool:
+        return all(c["state"] == self.READY for c in self._components.values() if c["required"])
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {
+                name: {
+                    "state": c["state"],
+                    "attempts": c["attempts"],
+                    "error": c["error"],
+                    "duration_seconds": c["duration_seconds"],
+                }
+                for name, c in self._components.items()
+            }
+        return {
+            "ready": self.is_ready(),
+            "uptime_seconds": round(time.time() - self._started_at, 1),
+            "components": components
+        }
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modelloader
+from benchmarks.load_test import HashingEncoder
+
+
+@pytest.fixture
+def local_backend(tmp_path, monkeypatch):
+    """VECTOR_BACKEND=local in a temp dir, with a hashing encoder instead of the transformer"""
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_VECTOR_PATH", str(tmp_path))
+    monkeypatch.setitem(modelloader._models, "all-MiniLM-L12-v2", HashingEncoder())
+    return tmp_path
+
+
+def make_records(n, start=1, **extra):
+    skills = [["python", "sql"], ["react", "javascript"], ["forklift", "lojistik"], ["excel", "satış"]]
+    return [
+        {"id": start + i, "userId": 1000 + i, "skills": skills[i % len(skills)] + [f"s{i % 7}"],
+         "latitude": 41.0 + i * 0.01, "longitude": 29.0, **extra}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def ignore_system():
+    import fakeredis
+    from IgnoreRelationSystem import IgnoreRelationSystemRedisOptimized
+
+    system = IgnoreRelationSystemRedisOptimized()
+    system.redis = fakeredis.FakeRedis(decode_responses=True)
+    return system
@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+
+from jobsearch import JobSearchSystem
+from localvectorstore import LocalCollection
+from tests.conftest import make_records
+
+
+def _columns(ids, dim=8):
+    rng = np.random.default_rng(0)
+    return [list(ids), rng.normal(size=(len(ids), dim)).tolist(),
+            [json.dumps({"skills": ["x"]}) for _ in ids], [False] * len(ids)]
+
+
+def test_snapshot_survives_restart(tmp_path):
+    collection = LocalCollection("c", 8, str(tmp_path))
+    collection.insert(_columns(range(10)))
+    collection.delete("id in [3, 4]")
+    collection.flush()
+
+    reopened = LocalCollection("c", 8, str(tmp_path))
+    assert reopened.num_entities == 8
+    assert {row["id"] for row in reopened.query("id in [3, 4, 5]", output_fields=["id"])} == {5}
+
+
+def test_add_jobs_persists_without_delete(local_backend):
+    system = JobSearchSystem()
+    assert system.add_jobs(make_records(10))
+
+    restarted = JobSearchSystem()
+    assert restarted.collection.num_entities == 10
+
+
+def test_update_ignore_status_persists(local_backend):
+    system = JobSearchSystem()
+    system.add_jobs(make_records(3))
+    assert system.update_ignore_status(2, True)
+
+    restarted = JobSearchSystem()
+    row = restarted.collection.query("id == 2", output_fields=["job_data"])[0]
+    assert json.loads(row["job_data"])["is_ignored"] is True
+
+
+def test_writes_after_snapshot_go_to_the_log(tmp_path):
+    collection = LocalCollection("c", 8, str(tmp_path))
+    collection.insert(_columns(range(10)))
+    collection.flush()
+    data_file = tmp_path / "c" / LocalCollection.DATA_FILE
+    snapshot = data_file.read_bytes()
+
+    collection.create_partition("t_a")
+    collection.upsert(_columns([3]), partition_name="t_a")
+    collection.insert(_columns([20]))
+    collection.delete("id in [5]")
+    collection.flush()
+    # Tek satırlık yazma snapshot'ı yeniden yazmaz
+    assert data_file.read_bytes() == snapshot
+
+    reopened = LocalCollection("c", 8, str(tmp_path))
+    ids = {row["id"] for row in reopened.query("id >= 0", output_fields=["id"])}
+    assert ids == set(range(10)) - {5} | {20}
+    assert [row["id"] for row in reopened.query("id >= 0", partition_names=["t_a"])] == [3]
+
+
+def test_truncated_log_line_is_ignored(tmp_path):
+    collection = LocalCollection("c", 8, str(tmp_path))
+    collection.insert(_columns(range(3)))
+    collection.flush()
+    collection.insert(_columns([7]))
+    collection.flush()
+    with open(tmp_path / "c" / LocalCollection.LOG_FILE, "a") as f:
+        f.write('{"op": "put", "row": 4')
+
+    reopened = LocalCollection("c", 8, str(tmp_path))
+    assert reopened.num_entities == 4
+    reopened.insert(_columns([8]))
+    reopened.flush()
+    assert LocalCollection("c", 8, str(tmp_path)).num_entities == 5
@@ -0,0 +1,41 @@
+import pytest
+
+from jobsearch import JobSearchSystem
+from jobseeker import JobSeekerSearchSystem
+from matchmaterializer import MatchMaterializer
+from tests.conftest import make_records
+
+
+def test_reinserted_anchor_is_not_fresh(local_backend, ignore_system):
+    jobs, seekers = JobSearchSystem(), JobSeekerSearchSystem()
+    jobs.add_jobs(make_records(8))
+    seekers.add_jobs(make_records(4))
+    materializer = MatchMaterializer(jobs, seekers, ignore_system, top_n=5)
+
+    materializer.materialize("seeker", [1])
+    assert materializer.get_matches("seeker", 1)["results"]
+
+    materializer.on_inserted("seeker", [1])
+    assert materializer.get_matches("seeker", 1) is None
+
+    materializer.refresh()
+    assert materializer.get_matches("seeker", 1) is not None
+
+
+def test_new_ids_survive_a_failed_refresh(local_backend, ignore_system):
+    jobs, seekers = JobSearchSystem(), JobSeekerSearchSystem()
+    jobs.add_jobs(make_records(8))
+    seekers.add_jobs(make_records(4))
+    materializer = MatchMaterializer(jobs, seekers, ignore_system, top_n=5)
+    materializer.on_inserted("seeker", [1, 2])
+
+    search_vectors = jobs.search_vectors
+    jobs.search_vectors = lambda *args, **kwargs: (_ for _ in ()).throw(ConnectionError("milvus down"))
+    with pytest.raises(ConnectionError):
+        materializer.refresh()
+    assert materializer.get_matches("seeker", 1) is None
+
+    jobs.search_vectors = search_vectors
+    materializer.refresh()
+    assert materializer.get_matches("seeker", 1) is not None
+    assert not ignore_system.redis.smembers("matches:new:seeker")
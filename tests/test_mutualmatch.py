@@ -0,0 +1,42 @@
+from jobsearch import JobSearchSystem
+from jobseeker import JobSeekerSearchSystem
+from mutualmatch import MutualMatchSystem
+
+
+def _systems(ignore_system):
+    jobs, seekers = JobSearchSystem(), JobSeekerSearchSystem()
+    jobs.add_jobs([
+        {"id": 1, "skills": ["python", "sql"], "latitude": 41.0, "longitude": 29.0},
+        {"id": 2, "skills": ["python", "sql", "docker", "kubernetes", "aws", "go"], "latitude": 41.0, "longitude": 29.0},
+        {"id": 3, "skills": ["forklift", "lojistik"], "latitude": 41.0, "longitude": 29.0},
+    ])
+    seekers.add_jobs([
+        {"id": 10, "skills": ["python", "sql", "docker"], "latitude": 41.0, "longitude": 29.0},
+    ])
+    return MutualMatchSystem(jobs, seekers, ignore_system)
+
+
+def test_directions_are_asymmetric(local_backend, ignore_system):
+    matches = {m["job_post_id"]: m for m in _systems(ignore_system).matches_for_seeker(10)}
+
+    # Job 1 asks only for skills the seeker has, but uses only two of the seeker's three
+    assert matches[1]["job_to_seeker_score"] > matches[1]["seeker_to_job_score"]
+    # Job 2 uses all of the seeker's skills but the seeker covers only half of the job
+    assert matches[2]["seeker_to_job_score"] > matches[2]["job_to_seeker_score"]
+    assert matches[3]["score"] < min(matches[1]["score"], matches[2]["score"])
+
+
+def test_job_anchor_keeps_direction_labels(local_backend, ignore_system):
+    mutual = _systems(ignore_system)
+    from_job = {m["job_seeker_id"]: m for m in mutual.matches_for_job(2)}
+
+    assert from_job[10]["seeker_to_job_score"] > from_job[10]["job_to_seeker_score"]
+
+
+def test_candidate_ids_and_ignores(local_backend, ignore_system):
+    mutual = _systems(ignore_system)
+    ignore_system.add_ignore_relation(10, 1, True)
+
+    matches = mutual.matches_for_seeker(10, candidate_ids=[1, 2])
+    assert [m["job_post_id"] for m in matches] == [2]
+    assert mutual.matches_for_seeker(99) is None
@@ -0,0 +1,116 @@
+from jobsearch import JobSearchSystem
+from jobseeker import JobSeekerSearchSystem
+from localvectorstore import LocalCollection
+from matchmaterializer import MatchMaterializer
+from mutualmatch import MutualMatchSystem
+from partitioning import PartitionManager
+from tests.conftest import make_records
+
+
+class _TrackingCollection(LocalCollection):
+    def __init__(self):
+        super().__init__("c", 8)
+        self.released = []
+
+    def partition(self, name):
+        partition = super().partition(name)
+        partition.release = lambda *args, **kwargs: self.released.append(name)
+        return partition
+
+
+class _System:
+    def __init__(self):
+        self.collection = _TrackingCollection()
+        self.collection_name = "c"
+
+
+def _manager(max_loaded=3, partitions=6):
+    manager = PartitionManager(_System(), strategy="tenant", max_loaded=max_loaded, idle_seconds=3600)
+    for i in range(partitions):
+        manager.ensure_partition(f"t_{i}")
+    return manager
+
+
+def test_full_scan_keeps_every_partition_loaded():
+    manager = _manager()
+    released = manager.system.collection.released
+
+    with manager.using_all():
+        assert len(manager.loaded_partitions()) == 7
+        manager.ensure_loaded(["t_0"])
+        assert released == []
+
+    # Taramadan sonra fazlalık serbest bırakılır
+    assert len(manager.loaded_partitions()) <= 3 + 1
+
+
+def test_pinned_partitions_are_not_released():
+    manager = _manager(max_loaded=1)
+    released = manager.system.collection.released
+
+    with manager.using(["t_0", "t_1"]):
+        manager.ensure_loaded(["t_2"])
+        manager.ensure_loaded(["t_3"])
+        assert "t_0" not in released and "t_1" not in released
+    assert "t_0" in released or "t_1" in released
+
+
+def test_tenant_is_persisted_and_scopes_search(local_backend, monkeypatch, ignore_system):
+    monkeypatch.setenv("PARTITION_STRATEGY", "tenant")
+    jobs, seekers = JobSearchSystem(), JobSeekerSearchSystem()
+    jobs.add_jobs(make_records(6, tenantId="a") + make_records(6, start=100, tenantId="b"))
+    seekers.add_jobs(make_records(2, tenantId="a"))
+
+    assert jobs.get_job_by_id(100)["tenantId"] == "b"
+    seeker = seekers.get_seeker_by_id(1)
+    assert seeker["tenantId"] == "a"
+
+    live = {r["job_id"] for r in jobs.search_jobs(seeker)["results"]}
+    assert live and live <= set(range(1, 7))
+
+    materializer = MatchMaterializer(jobs, seekers, ignore_system)
+    materializer.materialize("seeker", [1])
+    assert {r["job_id"] for r in materializer.get_matches("seeker", 1)["results"]} == live
+
+    mutual = MutualMatchSystem(jobs, seekers, ignore_system).matches_for_seeker(1)
+    assert {m["job_post_id"] for m in mutual} == live
+
+    # Bir restart sonrası (routes boş) da tenant bilgisi job_data'dan gelir
+    restarted = JobSearchSystem()
+    assert restarted.partitions.partition_for(restarted.get_job_by_id(100)) == "t_b"
+
+
+def test_partition_created_by_another_process_becomes_searchable():
+    manager = _manager()
+    other = PartitionManager(manager.system, strategy="tenant")
+    assert manager.search_partitions({"tenantId": "b"}) == []
+
+    other.ensure_partition("t_b")
+    assert manager.search_partitions({"tenantId": "b"}) == []  # refresh_seconds içinde tekrar okunmaz
+    manager.refresh_seconds = 0
+    assert manager.search_partitions({"tenantId": "b"}) == ["t_b"]
+
+
+def test_update_without_routes_keeps_row_in_its_partition(local_backend, monkeypatch):
+    monkeypatch.setenv("PARTITION_STRATEGY", "tenant")
+    jobs = JobSearchSystem()
+    jobs.add_jobs(make_records(2, tenantId="a"))
+
+    # Örn. write consumer: aynı koleksiyon, routes hiç kurulmamış
+    consumer = JobSearchSystem(auto_init=False)
+    consumer.collection = jobs.collection
+    assert consumer.update_ignore_status(1, True)
+    assert consumer.mark_job_as_deleted(2)
+
+    in_tenant = jobs.collection.query("id >= 0", output_fields=["id"], partition_names=["t_a"])
+    assert {row["id"] for row in in_tenant} == {1, 2}
+
+
+def test_warmup_loads_only_the_default_partition(local_backend, monkeypatch):
+    monkeypatch.setenv("PARTITION_STRATEGY", "tenant")
+    jobs = JobSearchSystem()
+    jobs.add_jobs(make_records(2, tenantId="a") + make_records(2, start=10, tenantId="b"))
+
+    restarted = JobSearchSystem()
+    restarted.warmup()
+    assert restarted.partitions.loaded_partitions() == ["_default"]
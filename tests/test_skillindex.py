@@ -0,0 +1,38 @@
+from skillindex import SkillIndex
+
+
+def test_overlap_uses_current_hit_skills():
+    index = SkillIndex()
+    index.add(1, ["python", "sql"])
+    index.add(2, ["react"])
+
+    assert index.overlap_scores(["react"], [1], [["python", "sql"]])[0] == 0
+    # Başka bir süreç 1'in skill'lerini güncelledi; hit'in job_data'sı yeni listeyi taşır
+    assert index.overlap_scores(["react"], [1], [["react", "Python "]])[0] > 0
+    assert index.candidates(["react"]) == {1, 2}
+    assert index.candidates(["sql"]) == set()
+
+
+def test_known_skills_are_not_reindexed():
+    index = SkillIndex()
+    index.add(1, ["python", "sql"])
+    skills_before = index.entity_skills[1]
+    index.overlap_scores(["python"], [1], [["python", "sql"]])
+    assert index.entity_skills[1] is skills_before
+
+    # Farklı yazım bir kez yeniden indekslenir, sonra parmak izi eşleşir
+    index.overlap_scores(["python"], [1], [["SQL", "python"]])
+    skills_after = index.entity_skills[1]
+    index.overlap_scores(["python"], [1], [["SQL", "python"]])
+    assert index.entity_skills[1] is skills_after
+    assert sorted(skills_after.tolist()) == sorted(skills_before.tolist())
+
+
+def test_coverage_is_directional():
+    index = SkillIndex()
+    for i, skills in enumerate([["python", "sql", "docker", "aws"], ["excel"], ["react"]]):
+        index.add(i, skills)
+
+    query_coverage, candidate_coverage = index.coverage_scores(["python", "sql"], [0])
+    assert query_coverage[0] == 1.0
+    assert 0 < candidate_coverage[0] < 1
@@ -0,0 +1,105 @@
+import threading
+
+from jobsearch import JobSearchSystem
+from jobseeker import JobSeekerSearchSystem
+from tests.conftest import make_records
+from writequeue import InMemoryWriteQueue, WriteConsumer, WriteStatusStore, make_event
+
+
+def _consumer(ignore_system):
+    jobs, seekers = JobSearchSystem(), JobSeekerSearchSystem()
+    queue = InMemoryWriteQueue()
+    status = WriteStatusStore(ignore_system.redis)
+    consumer = WriteConsumer(jobs, seekers, ignore_system, queue, status, max_batch=100, max_wait=0.05)
+    return consumer, queue, status, jobs
+
+
+def _publish(queue, status, event_type, entity, payload):
+    event = make_event(event_type, entity, payload)
+    status.set(event["job_id"], "queued")
+    queue.publish(event)
+    return event["job_id"]
+
+
+def _ids(system):
+    return {row["id"] for row in system.collection.query("is_deleted == false", output_fields=["id"])}
+
+
+def test_runs_are_merged_and_ordered(local_backend, ignore_system):
+    consumer, queue, status, jobs = _consumer(ignore_system)
+    calls = []
+    add_jobs = jobs.add_jobs
+    jobs.add_jobs = lambda records, **kwargs: calls.append(len(records)) or add_jobs(records, **kwargs)
+
+    records = make_records(4)
+    job_ids = [_publish(queue, status, "upsert", "job", [r]) for r in records]
+    job_ids.append(_publish(queue, status, "delete", "job", 2))
+    job_ids.append(_publish(queue, status, "delete", "job", 3))
+    job_ids.append(_publish(queue, status, "upsert", "job", records[2]))
+    job_ids.append(_publish(queue, status, "ignore", "relation", {"seeker_id": 7, "job_id": 1}))
+
+    assert consumer.run_once() == 8
+    # 4 upsert -> tek add_jobs, 2 delete -> tek delete_ids, sonra tekrar upsert
+    assert calls == [4, 1]
+    assert _ids(jobs) == {1, 3, 4}
+    assert ignore_system.get_ignored_jobs_for_seeker(7) == [1]
+    assert all(status.get(job_id)["status"] == "done" for job_id in job_ids)
+
+
+def test_failed_run_is_reported_and_others_still_apply(local_backend, ignore_system):
+    consumer, queue, status, jobs = _consumer(ignore_system)
+    bad = _publish(queue, status, "merge", "job", [{"id": 1}])
+    good = _publish(queue, status, "upsert", "seeker", make_records(1))
+
+    assert status.get(bad)["status"] == "queued"
+    consumer.run_once()
+    assert status.get(bad)["status"] == "failed"
+    assert "error" in status.get(bad)
+    assert status.get(good)["status"] == "done"
+
+
+def test_rejected_records_fail_only_their_events(local_backend, ignore_system):
+    consumer, queue, status, jobs = _consumer(ignore_system)
+    records = make_records(4)
+    good = [_publish(queue, status, "upsert", "job", [r]) for r in records[:2]]
+    no_skills = _publish(queue, status, "upsert", "job", {"id": 5, "skills": []})
+    bad_id = _publish(queue, status, "upsert", "job", [records[2], dict(records[3], id="abc")])
+
+    consumer.run_once()
+    assert all(status.get(job_id)["status"] == "done" for job_id in good)
+    assert status.get(no_skills)["status"] == "failed"
+    assert status.get(bad_id)["status"] == "failed"
+    # Aynı add_jobs çağrısındaki geçerli kayıtlar yine de yazılır
+    assert _ids(jobs) == {1, 2, 3}
+
+
+def test_run_forever_survives_queue_errors(local_backend, ignore_system):
+    consumer, queue, status, jobs = _consumer(ignore_system)
+    get_batch = queue.get_batch
+    failures = {"left": 2, "resets": 0}
+
+    def flaky(*args):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise ConnectionError("connection dropped")
+        return get_batch(*args)
+
+    def reset():
+        failures["resets"] += 1
+
+    queue.get_batch, queue.reset = flaky, reset
+    consumer.max_backoff = 0.01
+    job_id = _publish(queue, status, "upsert", "job", make_records(2))
+
+    thread = threading.Thread(target=consumer.run_forever, daemon=True)
+    thread.start()
+    for _ in range(200):
+        if status.get(job_id)["status"] == "done":
+            break
+        threading.Event().wait(0.02)
+    consumer.stop()
+    thread.join(timeout=5)
+
+    assert failures["resets"] == 2
+    assert status.get(job_id)["status"] == "done"
+    assert _ids(jobs) == {1, 2}